@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
@@ -121,6 +122,16 @@ CHAT_SETTINGS = {
     'MESSAGE_RETENTION_DAYS': 365,
     'TYPING_INDICATOR_TIMEOUT': 5,  # seconds
     'ONLINE_STATUS_TIMEOUT': 300,  # 5 minutes
+    'MESSAGE_CACHE_TIMEOUT': 60 * 60,  # 1 hour, serialized message payloads
+    'SOCKET_DB_WORKERS': 4,  # threads persisting Socket.io messages
+    # Socket.io concurrency model: 'threading' (default), or 'eventlet'/'gevent'
+    # for one green thread per socket. Non-threading modes need the package
+    # installed and the matching gunicorn worker class (see start.sh).
+    'SOCKETIO_ASYNC_MODE': env('SOCKETIO_ASYNC_MODE', default='threading'),
+    # Serve Socket.io at /socket.io/ from backend.wsgi_socketio
+    'SOCKETIO_ENABLED': env.bool('SOCKETIO_ENABLED', default=False),
+    # Per-packet python-socketio/engine.io logging; debugging only (SIO_DEBUG=1)
+    'SOCKETIO_DEBUG_LOGGING': env.bool('SIO_DEBUG', default=False),
 }
 
 
@@ -244,7 +255,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'chat.fast_json.OrjsonRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
         'rest_framework.parsers.JSONParser',
@@ -1,19 +1,23 @@
 """
-WSGI config for backend project.
-EMERGENCY FIX: Disable Socket.io wrapper completely to restore API functionality
+WSGI config for backend project with Socket.io support.
+
+When CHAT_SETTINGS['SOCKETIO_ENABLED'] is set (SOCKETIO_ENABLED=True), Socket.io
+is mounted in front of Django at /socket.io/ via socketio.WSGIApp, so transport
+requests never pass through Django's middleware or URL resolver. Otherwise the
+plain Django application is served.
 """
 
 import os
 import django
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 # Setup Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
-# Use standard Django WSGI - NO Socket.io wrapper
-application = get_wsgi_application()
-
-# TEMPORARY: Socket.io disabled to fix API calls
-# We'll implement Socket.io as a separate service or find a different integration method
-# This ensures all API calls work normally
\ No newline at end of file
+if settings.CHAT_SETTINGS.get('SOCKETIO_ENABLED'):
+    from chat.socketio_complete import create_app
+    application = create_app()
+else:
+    application = get_wsgi_application()
@@ -14,12 +14,31 @@ python manage.py collectstatic --no-input
 echo "🔄 Making migrations..."
 python manage.py makemigrations
 
+echo "📏 Clamping out-of-range profile values before constraints apply (one-off)..."
+# No-op once the constraints exist; a failure stops the build because migrate would fail too
+python manage.py clamp_profile_ranges || exit 1
+
+echo "🔑 Leaving one active encryption key per user before its constraint applies (one-off)..."
+python manage.py dedupe_active_encryption_keys || exit 1
+
 echo "⬆️ Migrating Database..." 
 python manage.py migrate
 
 echo "🗂️ Creating cache table for rate limiting..."
 python manage.py createcachetable
 
+echo "🏅 Syncing normalized profile sports..."
+python manage.py backfill_sports || echo "⚠️ Sports backfill failed, continuing..."
+
+echo "📍 Filling profile location displays..."
+python manage.py backfill_location_display || echo "⚠️ Location display backfill failed, continuing..."
+
+echo "🔗 Syncing mentor social link flags..."
+python manage.py backfill_social_links || echo "⚠️ Social links backfill failed, continuing..."
+
+echo "🎯 Reconciling talent pools..."
+python manage.py sync_talent_pools || echo "⚠️ Talent pool reconciliation failed, continuing..."
+
 echo "🧹 Running cleanup for orphaned data..."
 python manage.py cleanup_chat --days=30 || echo "⚠️ Cleanup failed, continuing..."
 
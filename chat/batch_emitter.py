@@ -0,0 +1,98 @@
+"""
+Coalescing emitter for Socket.IO broadcasts.
+
+Handlers queue events per target room and a single background task flushes
+each room's queue as one 'batch' emit every ``interval`` seconds, so a burst of
+small events costs one packet (and one write per client) instead of many.
+A queue reaching ``max_batch`` events is flushed immediately by the caller.
+Events queued with ``skip_sid`` (e.g. a sender's own typing indicator) go
+into their own per-room queue so that sid is left out of that packet.
+Clients unpack ``{'events': [{'event': name, 'data': payload}, ...]}``.
+
+Batching is opt-in per client: ``accepts_batch(sid)`` says whether a session
+negotiated it. Sessions that did not still get every event under its own
+name, so existing clients keep working unchanged.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEmitter:
+    """Per-room outbox flushed on a short timer or when it grows too large"""
+
+    def __init__(self, server, interval=0.015, max_batch=100, event='batch', accepts_batch=None, namespace='/'):
+        self.server = server
+        self.accepts_batch = accepts_batch or (lambda sid: True)
+        self.namespace = namespace
+        self.interval = interval
+        self.max_batch = max_batch
+        self.event = event
+        self._outbox = defaultdict(list)  # {(room key, skip_sid): [{'event': name, 'data': payload}]}
+        self._lock = threading.Lock()
+        self._flusher_started = False
+
+    @staticmethod
+    def _room_key(room):
+        # A list of rooms is emitted as one packet, so it is queued as one target
+        if isinstance(room, (list, tuple)):
+            return tuple(str(r) for r in room)
+        return str(room)
+
+    def queue(self, event, data, room, skip_sid=None):
+        """Queue event for the next batched emit to room (a room name or a list of them)"""
+        key = (self._room_key(room), skip_sid)
+        overflow = None
+        with self._lock:
+            events = self._outbox[key]
+            events.append({'event': event, 'data': data})
+            if len(events) >= self.max_batch:
+                overflow = self._outbox.pop(key)
+            if not self._flusher_started:
+                self._flusher_started = True
+                self.server.start_background_task(self._run)
+        if overflow:
+            self._emit(key, overflow)
+
+    def _split_recipients(self, rooms, skip_sid):
+        """(batch-capable sids, legacy sids) among the rooms' participants, minus skip_sid"""
+        capable, legacy = set(), set()
+        for room in rooms:
+            for sid, _ in self.server.manager.get_participants(self.namespace, room):
+                if sid != skip_sid:
+                    (capable if self.accepts_batch(sid) else legacy).add(sid)
+        return capable, legacy
+
+    def _emit(self, key, events):
+        room, skip_sid = key
+        rooms = list(room) if isinstance(room, tuple) else [room]
+        try:
+            capable, legacy = self._split_recipients(rooms, skip_sid)
+            # Clients that did not opt in get the original named events
+            for sid in legacy:
+                for item in events:
+                    self.server.emit(item['event'], item['data'], to=sid)
+            if capable:
+                skipped = [s for s in (skip_sid, *legacy) if s]
+                self.server.emit(
+                    self.event, {'events': events},
+                    room=rooms if len(rooms) > 1 else rooms[0],
+                    skip_sid=skipped or None
+                )
+        except Exception as e:
+            logger.error("Batch broadcast error for room %s: %s", room, e)
+
+    def _run(self):
+        """Background task: drain the outbox forever"""
+        while True:
+            self.server.sleep(self.interval)
+            with self._lock:
+                if not self._outbox:
+                    continue
+                pending = dict(self._outbox)
+                self._outbox.clear()
+            for key, events in pending.items():
+                self._emit(key, events)
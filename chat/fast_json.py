@@ -0,0 +1,46 @@
+"""
+orjson adapter exposing the subset of the ``json`` module interface that
+python-socketio uses (``dumps``/``loads``).
+
+orjson encodes datetime and UUID values natively in C, so Socket.IO payloads
+can carry model values directly instead of pre-formatting them in Python.
+Aware datetimes are rendered exactly like ``datetime.isoformat()``.
+
+``OrjsonRenderer`` applies the same encoder to DRF responses.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+_DUMPS_OPTIONS = orjson.OPT_NAIVE_UTC
+
+
+class OrjsonShim:
+    """Drop-in for the ``json`` argument of ``socketio.Server``"""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        # Extra json.dumps arguments (separators=...) are irrelevant: orjson is always compact
+        return orjson.dumps(obj, default=str, option=_DUMPS_OPTIONS).decode()
+
+    @staticmethod
+    def loads(data, *args, **kwargs):
+        return orjson.loads(data)
+
+
+class OrjsonRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson. Values orjson does not handle
+    natively (Decimal, lazy strings, ...) go through DRF's encoder; indented
+    output (?indent=) falls back to the stock renderer.
+    """
+    _options = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self._options)
+        # Match JSONRenderer: escape the two code points that are invalid in JS strings
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,12 +1,26 @@
 from django.core.management.base import BaseCommand
+from django.db import models, transaction
 from django.utils import timezone
 from datetime import timedelta
+import time
 from chat.models import Message, MessageAttachment, EncryptionKey
 from chat.encryption import SecurityUtils
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Retention used by each scheduled cleanup run (see deployment/crontab_example.txt)
+CLEANUP_TYPE_DAYS = {
+    'daily': 7,
+    'weekly': 30,
+    'monthly': 365,
+}
+
+# Old messages are removed in chunks of this many rows, each in its own short
+# transaction, so one cleanup run never holds locks or WAL for the whole backlog
+CLEANUP_BATCH_SIZE = 10000
+CLEANUP_BATCH_PAUSE = 0.05  # seconds between chunks, lets other transactions through
+
 class Command(BaseCommand):
     help = 'Clean up old chat data and expired encryption keys'
 
@@ -14,8 +28,13 @@ class Command(BaseCommand):
         parser.add_argument(
             '--days',
             type=int,
-            default=365,
-            help='Number of days to keep deleted messages (default: 365)'
+            default=None,
+            help='Number of days to keep deleted messages (default: 365, or the --type retention)'
+        )
+        parser.add_argument(
+            '--type',
+            choices=sorted(CLEANUP_TYPE_DAYS),
+            help='Scheduled cleanup to run: daily (7 days), weekly (30 days) or monthly (365 days)'
         )
         parser.add_argument(
             '--dry-run',
@@ -25,6 +44,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         days = options['days']
+        if days is None:
+            days = CLEANUP_TYPE_DAYS.get(options['type'], 365)
         dry_run = options['dry_run']
         
         self.stdout.write(f"Starting chat cleanup (keeping {days} days of data)")
@@ -37,20 +58,11 @@ class Command(BaseCommand):
             timestamp__lt=cutoff_date
         )
         
-        message_count = old_messages.count()
-        
         if dry_run:
+            message_count = old_messages.count()
             self.stdout.write(f"Would delete {message_count} old messages")
         else:
-            # Delete associated attachments first
-            old_attachments = MessageAttachment.objects.filter(
-                message__in=old_messages
-            )
-            attachment_count = old_attachments.count()
-            old_attachments.delete()
-            
-            # Delete messages
-            old_messages.delete()
+            message_count, attachment_count = self.delete_messages_in_chunks(old_messages)
             
             self.stdout.write(
                 self.style.SUCCESS(
@@ -85,3 +97,38 @@ class Command(BaseCommand):
             )
         
         self.stdout.write(self.style.SUCCESS("Chat cleanup completed"))
+
+    def delete_messages_in_chunks(self, messages):
+        """
+        Delete messages CLEANUP_BATCH_SIZE rows at a time without the deletion
+        collector. Each chunk's dependent rows are handled with plain
+        DELETE/UPDATE statements following the relation's on_delete, so no
+        model instances are loaded and no delete signals are sent.
+        Returns (messages deleted, attachments deleted).
+        """
+        message_total = attachment_total = 0
+        while True:
+            ids = list(messages.values_list('pk', flat=True)[:CLEANUP_BATCH_SIZE])
+            if not ids:
+                break
+            
+            with transaction.atomic():
+                for relation in Message._meta.related_objects:
+                    related = relation.related_model._base_manager.filter(
+                        **{f"{relation.field.name}__in": ids}
+                    )
+                    if relation.on_delete is models.CASCADE:
+                        deleted = related._raw_delete(related.db)
+                        if relation.related_model is MessageAttachment:
+                            attachment_total += deleted
+                    elif relation.on_delete is models.SET_NULL:
+                        related.update(**{relation.field.name: None})
+                
+                chunk = Message._base_manager.filter(pk__in=ids)
+                message_total += chunk._raw_delete(chunk.db)
+            
+            logger.info(f"Chat cleanup deleted a chunk of {len(ids)} messages ({message_total} so far)")
+            self.stdout.write(f"Deleted {message_total} old messages so far")
+            time.sleep(CLEANUP_BATCH_PAUSE)
+        
+        return message_total, attachment_total
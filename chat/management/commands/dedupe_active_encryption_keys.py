@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from chat.models import EncryptionKey
+
+CONSTRAINT_NAME = 'chat_encryptionkey_one_active_per_user'
+
+
+class Command(BaseCommand):
+    help = (
+        'One-off: deactivate all but the newest active encryption key of each user so migrate can add '
+        'the one-active-key constraint. A no-op once the constraint exists.'
+    )
+
+    def handle(self, *args, **options):
+        table = EncryptionKey._meta.db_table
+        with connection.cursor() as cursor:
+            if table not in connection.introspection.table_names(cursor):
+                self.stdout.write(f"{table} does not exist yet, nothing to dedupe")
+                return
+            if CONSTRAINT_NAME in connection.introspection.get_constraints(cursor, table):
+                self.stdout.write(f"{table}: {CONSTRAINT_NAME} already installed, nothing to dedupe")
+                return
+        
+        # An active key is superseded when the same user has a newer active one
+        # (ties on created_at broken by id, so exactly one survives)
+        newer_active = EncryptionKey.objects.filter(
+            Q(created_at__gt=OuterRef('created_at')) |
+            Q(created_at=OuterRef('created_at'), id__gt=OuterRef('id')),
+            user_id=OuterRef('user_id'),
+            is_active=True
+        )
+        superseded = EncryptionKey.objects.filter(is_active=True).filter(Exists(newer_active))
+        key_ids = list(superseded.values_list('key_id', flat=True))
+        superseded.update(is_active=False)
+        for key_id in key_ids:
+            self.stdout.write(self.style.WARNING(f"Deactivated superseded key {key_id}"))
+        self.stdout.write(self.style.SUCCESS(f"Deactivated {len(key_ids)} superseded encryption keys"))
@@ -6,7 +6,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, Prefetch
 from mentor.models import MentorProfile
 from core.models import MentorTalentSelection
 from talent.models import TalentProfile
@@ -56,23 +56,27 @@ class MentorTalentChatViewSet(viewsets.ViewSet):
         ).filter(
             participants__in=talent_users
         ).distinct().prefetch_related(
-            'participants',
-            'memberships__user',
-            'messages'
+            Prefetch('participants', queryset=User.objects.select_related('talent_profile')),
+            Prefetch(
+                'memberships',
+                queryset=RoomMembership.objects.filter(user=user).with_unread_count(),
+                to_attr='my_membership'
+            ),
+            Prefetch(
+                'messages',
+                queryset=Message.objects.filter(is_deleted=False).order_by('-timestamp')[:1],
+                to_attr='recent_messages'
+            )
         ).order_by('-updated_at')
         
         # Add talent profile info and additional details to each room
         room_data = []
         for room in chat_rooms:
             # Get mentor's membership in this room to get unread count
-            try:
-                membership = room.memberships.get(user=user)
-                unread_count = membership.unread_count
-            except RoomMembership.DoesNotExist:
-                unread_count = 0
+            unread_count = room.my_membership[0].unread_count if room.my_membership else 0
             
             # Get last message if exists
-            last_message = room.last_message
+            last_message = room.recent_messages[0] if room.recent_messages else None
             
             room_serializer = ChatRoomSerializer(room)
             room_info = room_serializer.data
@@ -86,7 +90,8 @@ class MentorTalentChatViewSet(viewsets.ViewSet):
                 room_info['last_message'] = None
             
             # Get the talent in this room
-            talent_user = room.participants.exclude(id=user.id).first()
+            # Filter the prefetched participants; .exclude() would bypass the cache
+            talent_user = next((p for p in room.participants.all() if p.id != user.id), None)
             if talent_user and hasattr(talent_user, 'talent_profile'):
                 room_info['talent_info'] = {
                     'id': talent_user.id,
@@ -135,23 +140,27 @@ class MentorTalentChatViewSet(viewsets.ViewSet):
         ).filter(
             participants__in=mentor_users
         ).distinct().prefetch_related(
-            'participants',
-            'memberships__user',
-            'messages'
+            Prefetch('participants', queryset=User.objects.select_related('mentor_profile')),
+            Prefetch(
+                'memberships',
+                queryset=RoomMembership.objects.filter(user=user).with_unread_count(),
+                to_attr='my_membership'
+            ),
+            Prefetch(
+                'messages',
+                queryset=Message.objects.filter(is_deleted=False).order_by('-timestamp')[:1],
+                to_attr='recent_messages'
+            )
         ).order_by('-updated_at')
         
         # Add mentor profile info and additional details to each room
         room_data = []
         for room in chat_rooms:
             # Get talent's membership in this room to get unread count
-            try:
-                membership = room.memberships.get(user=user)
-                unread_count = membership.unread_count
-            except RoomMembership.DoesNotExist:
-                unread_count = 0
+            unread_count = room.my_membership[0].unread_count if room.my_membership else 0
             
             # Get last message if exists
-            last_message = room.last_message
+            last_message = room.recent_messages[0] if room.recent_messages else None
             
             room_serializer = ChatRoomSerializer(room)
             room_info = room_serializer.data
@@ -165,7 +174,8 @@ class MentorTalentChatViewSet(viewsets.ViewSet):
                 room_info['last_message'] = None
             
             # Get the mentor in this room
-            mentor_user = room.participants.exclude(id=user.id).first()
+            # Filter the prefetched participants; .exclude() would bypass the cache
+            mentor_user = next((p for p in room.participants.all() if p.id != user.id), None)
             if mentor_user and hasattr(mentor_user, 'mentor_profile'):
                 room_info['mentor_info'] = {
                     'id': mentor_user.id,
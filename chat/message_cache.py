@@ -0,0 +1,83 @@
+"""
+Per-message cache for serialized chat messages.
+
+A message is effectively immutable once sent: only an edit (which bumps
+``edited_at``) or a soft delete changes what MessageSerializer renders.
+Serialized payloads are therefore cached under a key versioned by
+``edited_at`` so that re-opening a busy room does not re-run DRF
+serialization for every message on the page.
+
+Fields that change independently of the message row (the read-receipt
+summary, the sender's profile and avatar, the reply_to preview) are never
+cached and are rendered fresh on every request; each distinct user is
+rendered once per page.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .serializers import (
+    MessageSerializer, UserBasicSerializer, message_reply_summary, message_status_summary
+)
+
+# Fields rendered fresh on every request instead of being stored in the cache
+UNCACHED_FIELDS = ('status_summary', 'sender', 'reply_to')
+
+
+def _cache_timeout():
+    return settings.CHAT_SETTINGS.get('MESSAGE_CACHE_TIMEOUT', 60 * 60)
+
+
+def message_cache_key(message):
+    """Cache key for a message, versioned by its last edit (to the microsecond)"""
+    version = f"{message.edited_at:%Y%m%d%H%M%S%f}" if message.edited_at else 0
+    return f"chat:msg:{message.id}:v{version}"
+
+
+def _render_uncached_fields(message, context, rendered_users):
+    request = (context or {}).get('request')
+    
+    def render_user(user):
+        if user.pk not in rendered_users:
+            rendered_users[user.pk] = UserBasicSerializer(user, context=context).data
+        return rendered_users[user.pk]
+    
+    reply_to = message.reply_to if message.reply_to_id else None
+    return {
+        'status_summary': message_status_summary(message, getattr(request, 'user', None)),
+        'sender': render_user(message.sender),
+        'reply_to': message_reply_summary(reply_to, render_user(reply_to.sender)) if reply_to else None,
+    }
+
+
+def serialize_messages(messages, context=None):
+    """Serialize messages, reusing cached payloads where available"""
+    messages = list(messages)
+    keys = [message_cache_key(message) for message in messages]
+    cached = cache.get_many(keys)
+
+    missing = [message for message, key in zip(messages, keys) if key not in cached]
+    rendered = {}
+    if missing:
+        for message, data in zip(missing, MessageSerializer(missing, many=True, context=context).data):
+            rendered[message_cache_key(message)] = data
+        cache.set_many({
+            key: {name: value for name, value in data.items() if name not in UNCACHED_FIELDS}
+            for key, data in rendered.items()
+        }, _cache_timeout())
+
+    results = []
+    rendered_users = {}
+    for message, key in zip(messages, keys):
+        if key in rendered:
+            results.append(rendered[key])
+            continue
+        # Merge in serializer field order so cached and fresh payloads look alike
+        data = {**cached[key], **_render_uncached_fields(message, context, rendered_users)}
+        results.append({name: data[name] for name in MessageSerializer.Meta.fields})
+    return results
+
+
+def invalidate_cached_message(message):
+    """Drop the cached payload for a message (e.g. after a soft delete)"""
+    cache.delete(message_cache_key(message))
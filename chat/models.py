@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connection, models
 from django.conf import settings
 from django.utils import timezone
 from cloudinary.models import CloudinaryField
@@ -24,6 +24,19 @@ class ChatRoom(models.Model):
     description = models.TextField(blank=True, null=True)
     avatar = CloudinaryField('image', blank=True, null=True)
     
+    # "<lower user id>:<higher user id>" for private rooms, so the pair lookup
+    # is a single unique-index probe instead of a self-join on participants
+    private_room_key = models.CharField(max_length=80, unique=True, blank=True, null=True, editable=False)
+    
+    # Snapshot of the latest message so room lists need no message join.
+    # The preview is the message's encrypted_content as sent; clients decrypt it.
+    last_message_preview = models.TextField(blank=True, null=True, editable=False)
+    last_message_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True,
+        related_name='+', editable=False
+    )
+    last_message_timestamp = models.DateTimeField(blank=True, null=True, editable=False)
+    
     class Meta:
         ordering = ['-updated_at']
         indexes = [
@@ -41,6 +54,43 @@ class ChatRoom(models.Model):
                 return f"Chat between {participants[0].username} and {participants[1].username}"
         return f"Room {self.id}"
     
+    @staticmethod
+    def private_room_key_for(user_a_id, user_b_id):
+        """Order-independent key identifying the private room between two users"""
+        low, high = sorted((str(user_a_id), str(user_b_id)))
+        return f"{low}:{high}"
+    
+    @classmethod
+    def get_private_room(cls, user_a_id, user_b_id):
+        """Return the private room between two users, or None"""
+        key = cls.private_room_key_for(user_a_id, user_b_id)
+        room = cls.objects.filter(private_room_key=key).first()
+        if room is not None:
+            return room
+        
+        # Rooms created before private_room_key existed: find via the join once
+        # and record the key so later lookups hit the index.
+        room = cls.objects.filter(
+            room_type='private',
+            private_room_key__isnull=True,
+            participants=user_a_id
+        ).filter(
+            participants=user_b_id
+        ).first()
+        if room is not None:
+            cls.objects.filter(pk=room.pk).update(private_room_key=key)
+            room.private_room_key = key
+        return room
+    
+    def record_last_message(self, message):
+        """Store the last-message snapshot and bump updated_at in one UPDATE"""
+        ChatRoom.objects.filter(pk=self.pk).update(
+            last_message_preview=message.encrypted_content,
+            last_message_sender_id=message.sender_id,
+            last_message_timestamp=message.timestamp,
+            updated_at=timezone.now()
+        )
+    
     @property
     def last_message(self):
         return self.messages.filter(is_deleted=False).last()
@@ -48,9 +98,30 @@ class ChatRoom(models.Model):
     def get_other_participant(self, user):
         """Get the other participant in a private chat"""
         if self.room_type == 'private':
-            return self.participants.exclude(id=user.id).first()
+            # Filter in Python so a prefetched participants cache is reused
+            return next((p for p in self.participants.all() if p.id != user.id), None)
         return None
 
+class MessageQuerySet(models.QuerySet):
+    def with_status_summary(self, user=None):
+        """Annotate read/delivered counts (and user's own status) in one query"""
+        queryset = self.annotate(
+            _read_count=models.Count('statuses', filter=models.Q(statuses__status='read')),
+            _delivered_count=models.Count(
+                'statuses', filter=models.Q(statuses__status__in=['delivered', 'read'])
+            ),
+        )
+        if user is not None:
+            # Only the requesting user's status row is read, never every participant's
+            queryset = queryset.annotate(
+                _my_status=models.Subquery(
+                    MessageStatus.objects.filter(
+                        message=models.OuterRef('pk'), user=user
+                    ).values('status')[:1]
+                )
+            )
+        return queryset
+
 class Message(models.Model):
     """Message model with encryption support"""
     MESSAGE_TYPES = (
@@ -80,6 +151,8 @@ class Message(models.Model):
     # Reply functionality
     reply_to = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True, related_name='replies')
     
+    objects = MessageQuerySet.as_manager()
+    
     class Meta:
         ordering = ['timestamp']
         indexes = [
@@ -97,7 +170,15 @@ class Message(models.Model):
         """Soft delete message"""
         self.is_deleted = True
         self.encrypted_content = None
-        self.save()
+        self.save(update_fields=['is_deleted', 'encrypted_content'])
+        self.sync_room_preview()
+    
+    def sync_room_preview(self):
+        """Refresh the room's last-message preview if this is the latest message"""
+        ChatRoom.objects.filter(
+            pk=self.room_id,
+            last_message_timestamp=self.timestamp
+        ).update(last_message_preview=self.encrypted_content)
 
 class MessageAttachment(models.Model):
     """File attachments for messages"""
@@ -141,6 +222,53 @@ class MessageStatus(models.Model):
         
     def __str__(self):
         return f"{self.user.username} - {self.status} - {self.message.id}"
+    
+    @classmethod
+    def mark_read(cls, user, message_ids):
+        """
+        Upsert 'read' statuses for the messages in message_ids that user can see.
+        The visibility check and the upsert are one INSERT ... SELECT ... ON
+        CONFLICT DO UPDATE; no ids or rows are loaded into Python.
+        Returns the number of messages marked.
+        """
+        message_ids = [str(message_id) for message_id in message_ids]
+        if not message_ids:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {cls._meta.db_table} (message_id, user_id, status, timestamp)
+                SELECT m.id, %s, 'read', NOW()
+                FROM {Message._meta.db_table} m
+                JOIN {ChatRoom.participants.through._meta.db_table} p
+                    ON p.chatroom_id = m.room_id AND p.user_id = %s
+                WHERE m.id = ANY(%s::uuid[])
+                ON CONFLICT (message_id, user_id) DO UPDATE SET status = EXCLUDED.status
+                """,
+                [user.pk, user.pk, message_ids]
+            )
+            return cursor.rowcount
+    
+    @classmethod
+    def bulk_upsert_status(cls, message_id, user_ids, status):
+        """
+        Set status on message_id for every user in user_ids with a single
+        INSERT ... ON CONFLICT DO UPDATE statement (no preliminary SELECT).
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {cls._meta.db_table} (message_id, user_id, status, timestamp)
+                SELECT %s::uuid, user_id, %s, NOW()
+                FROM unnest(%s::bigint[]) AS user_id
+                ON CONFLICT (message_id, user_id) DO UPDATE SET status = EXCLUDED.status
+                """,
+                [str(message_id), status, user_ids]
+            )
+            return cursor.rowcount
 
 class UserPresence(models.Model):
     """Track user online/offline status"""
@@ -162,23 +290,23 @@ class UserPresence(models.Model):
     def set_online(self):
         self.status = 'online'
         self.last_seen = timezone.now()
-        self.save()
+        self.save(update_fields=['status', 'last_seen'])
     
     def set_offline(self):
         self.status = 'offline'
         self.is_typing_in = None
         self.typing_started_at = None
-        self.save()
+        self.save(update_fields=['status', 'is_typing_in', 'typing_started_at', 'last_seen'])
     
     def start_typing(self, room):
         self.is_typing_in = room
         self.typing_started_at = timezone.now()
-        self.save()
+        self.save(update_fields=['is_typing_in', 'typing_started_at', 'last_seen'])
     
     def stop_typing(self):
         self.is_typing_in = None
         self.typing_started_at = None
-        self.save()
+        self.save(update_fields=['is_typing_in', 'typing_started_at', 'last_seen'])
 
 class EncryptionKey(models.Model):
     """Store public keys for end-to-end encryption"""
@@ -190,10 +318,29 @@ class EncryptionKey(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            # At most one active key per user; concurrent rotations collide here
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_active=True),
+                name='chat_encryptionkey_one_active_per_user'
+            ),
+        ]
         
     def __str__(self):
         return f"Key {self.key_id} for {self.user.username}"
 
+class RoomMembershipQuerySet(models.QuerySet):
+    def with_unread_count(self):
+        """Annotate _unread_count so RoomMembership.unread_count needs no extra query"""
+        unread_filter = models.Q(room__messages__is_deleted=False) & (
+            models.Q(last_read_message__isnull=True) |
+            models.Q(room__messages__timestamp__gt=models.F('last_read_message__timestamp'))
+        )
+        return self.annotate(
+            _unread_count=models.Count('room__messages', filter=unread_filter, distinct=True)
+        )
+
 class RoomMembership(models.Model):
     """Track user membership in chat rooms with additional metadata"""
     ROLE_CHOICES = (
@@ -209,6 +356,8 @@ class RoomMembership(models.Model):
     last_read_message = models.ForeignKey(Message, on_delete=models.SET_NULL, blank=True, null=True)
     notifications_enabled = models.BooleanField(default=True)
     
+    objects = RoomMembershipQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['user', 'room']
         indexes = [
@@ -223,6 +372,8 @@ class RoomMembership(models.Model):
     
     @property
     def unread_count(self):
+        if hasattr(self, '_unread_count'):
+            return self._unread_count
         if not self.last_read_message:
             return self.room.messages.filter(is_deleted=False).count()
         return self.room.messages.filter(
@@ -0,0 +1,40 @@
+"""
+Cached room-access checks shared by the Socket.IO handlers and the REST views.
+
+Only grants are cached, {(user_id, room_id): True}, so an invitation never
+needs invalidating. Anything that takes a user out of a room (leaving,
+removal, deleting the room) calls ``invalidate_room_access`` so the socket
+server stops honouring the grant straight away instead of at TTL expiry.
+"""
+
+import threading
+
+from cachetools import TTLCache
+from django.core.exceptions import ValidationError
+
+from .models import ChatRoom
+
+_membership_cache = TTLCache(maxsize=100000, ttl=60)
+_membership_cache_lock = threading.Lock()
+
+
+def has_room_access(user_id, room_id):
+    """Whether user_id participates in room_id, cached for a minute"""
+    key = (str(user_id), str(room_id))
+    with _membership_cache_lock:
+        if key in _membership_cache:
+            return True
+    try:
+        allowed = ChatRoom.objects.filter(id=room_id, participants__id=user_id).exists()
+    except (ValueError, ValidationError):
+        return False
+    if allowed:
+        with _membership_cache_lock:
+            _membership_cache[key] = True
+    return allowed
+
+
+def invalidate_room_access(user_id, room_id):
+    """Forget a cached grant once user_id is no longer in room_id"""
+    with _membership_cache_lock:
+        _membership_cache.pop((str(user_id), str(room_id)), None)
@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.db.models.functions import Substr
 from .models import (
     ChatRoom, Message, MessageAttachment, MessageStatus, 
     UserPresence, EncryptionKey, RoomMembership
@@ -7,6 +10,38 @@ from .models import (
 
 User = get_user_model()
 
+# Columns actually read by UserBasicSerializer; everything else on the user and
+# profile rows (otp, refresh_token, social_links, cover photos...) stays in Postgres.
+# Bios are not listed: setup_eager_loading fetches only their first BIO_PREVIEW_LENGTH + 1 chars.
+USER_BASIC_ONLY_FIELDS = (
+    'id', 'username', 'firstname', 'lastname', 'full_name',
+    'user_type', 'gender', 'age', 'avatar',
+    'talent_profile__user', 'talent_profile__selected_sports',
+    'talent_profile__experience_years', 'talent_profile__is_verified',
+    'talent_profile__is_featured', 'talent_profile__location_display',
+    'talent_profile__profile_picture',
+    'mentor_profile__user', 'mentor_profile__selected_sports',
+    'mentor_profile__coaching_experience_years', 'mentor_profile__coaching_levels',
+    'mentor_profile__is_verified', 'mentor_profile__is_available',
+    'mentor_profile__location_display', 'mentor_profile__profile_picture',
+)
+
+BIO_PREVIEW_LENGTH = 100
+
+def _bio_preview(bio):
+    """Truncate a bio (or its DB-side BIO_PREVIEW_LENGTH + 1 prefix) for previews"""
+    if bio and len(bio) > BIO_PREVIEW_LENGTH:
+        return bio[:BIO_PREVIEW_LENGTH] + '...'
+    return bio
+
+def _user_profile(user):
+    """The talent or mentor profile matching the user's type, or None when it doesn't exist"""
+    if user.user_type == 'talent':
+        return getattr(user, 'talent_profile', None)
+    if user.user_type == 'mentor':
+        return getattr(user, 'mentor_profile', None)
+    return None
+
 class UserBasicSerializer(serializers.ModelSerializer):
     """Enhanced user serializer for chat contexts with profile data"""
     avatar_url = serializers.SerializerMethodField()
@@ -18,6 +53,16 @@ class UserBasicSerializer(serializers.ModelSerializer):
             'id', 'username', 'firstname', 'lastname', 'full_name', 
             'user_type', 'gender', 'age', 'avatar_url', 'profile_data'
         ]
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join both profiles and load only the columns this serializer renders"""
+        return queryset.select_related(
+            'talent_profile', 'mentor_profile'
+        ).only(*USER_BASIC_ONLY_FIELDS).annotate(
+            _talent_bio_short=Substr('talent_profile__bio', 1, BIO_PREVIEW_LENGTH + 1),
+            _mentor_bio_short=Substr('mentor_profile__bio', 1, BIO_PREVIEW_LENGTH + 1),
+        )
         
     def get_avatar_url(self, obj):
         # Check both user avatar and profile picture
@@ -25,46 +70,38 @@ class UserBasicSerializer(serializers.ModelSerializer):
             return obj.avatar.url
         
         # Check profile-specific avatar
-        try:
-            if obj.user_type == 'talent' and hasattr(obj, 'talent_profile'):
-                if obj.talent_profile.profile_picture:
-                    return obj.talent_profile.profile_picture.url
-            elif obj.user_type == 'mentor' and hasattr(obj, 'mentor_profile'):
-                if obj.mentor_profile.profile_picture:
-                    return obj.mentor_profile.profile_picture.url
-        except:
-            pass
+        profile = _user_profile(obj)
+        if profile is not None and profile.profile_picture:
+            return profile.profile_picture.url
             
         return None
     
     def get_profile_data(self, obj):
         """Get user-type specific profile data for richer chat context"""
-        try:
-            if obj.user_type == 'talent' and hasattr(obj, 'talent_profile'):
-                profile = obj.talent_profile
-                return {
-                    'bio': profile.bio[:100] + '...' if len(profile.bio) > 100 else profile.bio,
-                    'selected_sports': profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else [],
-                    'experience_years': profile.experience_years,
-                    'is_verified': profile.is_verified,
-                    'is_featured': profile.is_featured,
-                    'location': f"{profile.city}, {profile.state}" if profile.city and profile.state else profile.location
-                }
-            elif obj.user_type == 'mentor' and hasattr(obj, 'mentor_profile'):
-                profile = obj.mentor_profile
-                return {
-                    'bio': profile.bio[:100] + '...' if len(profile.bio) > 100 else profile.bio,
-                    'selected_sports': profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else [],
-                    'coaching_experience_years': profile.coaching_experience_years,
-                    'coaching_levels': profile.coaching_levels,
-                    'is_verified': profile.is_verified,
-                    'is_available': profile.is_available,
-                    'location': f"{profile.city}, {profile.state}" if profile.city and profile.state else profile.location
-                }
-        except:
-            pass
-            
-        return {}
+        profile = _user_profile(obj)
+        if profile is None:
+            return {}
+        
+        if obj.user_type == 'talent':
+            bio = obj._talent_bio_short if hasattr(obj, '_talent_bio_short') else profile.bio
+            return {
+                'bio': _bio_preview(bio),
+                'selected_sports': profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else [],
+                'experience_years': profile.experience_years,
+                'is_verified': profile.is_verified,
+                'is_featured': profile.is_featured,
+                'location': profile.location_display
+            }
+        bio = obj._mentor_bio_short if hasattr(obj, '_mentor_bio_short') else profile.bio
+        return {
+            'bio': _bio_preview(bio),
+            'selected_sports': profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else [],
+            'coaching_experience_years': profile.coaching_experience_years,
+            'coaching_levels': profile.coaching_levels,
+            'is_verified': profile.is_verified,
+            'is_available': profile.is_available,
+            'location': profile.location_display
+        }
 
 class UserPresenceSerializer(serializers.ModelSerializer):
     """User presence serializer"""
@@ -76,7 +113,7 @@ class UserPresenceSerializer(serializers.ModelSerializer):
 
 class MessageAttachmentSerializer(serializers.ModelSerializer):
     """Message attachment serializer"""
-    file_url = serializers.SerializerMethodField()
+    file_url = serializers.CharField(source='file.url', read_only=True, allow_null=True)
     
     class Meta:
         model = MessageAttachment
@@ -84,11 +121,6 @@ class MessageAttachmentSerializer(serializers.ModelSerializer):
             'id', 'file_url', 'file_name', 'file_size', 
             'file_type', 'is_encrypted', 'uploaded_at'
         ]
-        
-    def get_file_url(self, obj):
-        if obj.file:
-            return obj.file.url
-        return None
 
 class MessageStatusSerializer(serializers.ModelSerializer):
     """Message status serializer"""
@@ -98,11 +130,51 @@ class MessageStatusSerializer(serializers.ModelSerializer):
         model = MessageStatus
         fields = ['user', 'status', 'timestamp']
 
+def message_reply_summary(reply_to, sender_data):
+    """Preview of the message being replied to; sender_data is its rendered UserBasicSerializer"""
+    return {
+        'id': str(reply_to.id),
+        'sender': sender_data,
+        'message_type': reply_to.message_type,
+        'timestamp': reply_to.timestamp
+    }
+
+def message_status_summary(message, user=None):
+    """
+    Aggregated delivery info for a message:
+    {'read', 'delivered', 'my_status', 'read_by_me'}.
+    Uses the MessageQuerySet.with_status_summary() annotations when present.
+    """
+    if hasattr(message, '_read_count'):
+        read_count = message._read_count
+        delivered_count = message._delivered_count
+    else:
+        counts = message.statuses.aggregate(
+            read=Count('id', filter=Q(status='read')),
+            delivered=Count('id', filter=Q(status__in=['delivered', 'read'])),
+        )
+        read_count = counts['read']
+        delivered_count = counts['delivered']
+    
+    if user is None or not user.is_authenticated:
+        my_status = None
+    elif hasattr(message, '_my_status'):
+        my_status = message._my_status
+    else:
+        my_status = message.statuses.filter(user=user).values_list('status', flat=True).first()
+    
+    return {
+        'read': read_count,
+        'delivered': delivered_count,
+        'my_status': my_status,
+        'read_by_me': my_status == 'read',
+    }
+
 class MessageSerializer(serializers.ModelSerializer):
     """Message serializer with encryption support"""
     sender = UserBasicSerializer(read_only=True)
     attachments = MessageAttachmentSerializer(many=True, read_only=True)
-    statuses = MessageStatusSerializer(many=True, read_only=True)
+    status_summary = serializers.SerializerMethodField()
     reply_to = serializers.SerializerMethodField()
     
     class Meta:
@@ -110,18 +182,17 @@ class MessageSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'sender', 'message_type', 'encrypted_content', 
             'content_hash', 'timestamp', 'edited_at', 'is_edited',
-            'is_deleted', 'reply_to', 'attachments', 'statuses'
+            'is_deleted', 'reply_to', 'attachments', 'status_summary'
         ]
         read_only_fields = ['id', 'sender', 'timestamp', 'edited_at', 'is_edited']
+    
+    def get_status_summary(self, obj):
+        request = self.context.get('request')
+        return message_status_summary(obj, getattr(request, 'user', None))
         
     def get_reply_to(self, obj):
         if obj.reply_to:
-            return {
-                'id': str(obj.reply_to.id),
-                'sender': UserBasicSerializer(obj.reply_to.sender).data,
-                'message_type': obj.reply_to.message_type,
-                'timestamp': obj.reply_to.timestamp
-            }
+            return message_reply_summary(obj.reply_to, UserBasicSerializer(obj.reply_to.sender).data)
         return None
 
 class MessageCreateSerializer(serializers.ModelSerializer):
@@ -160,27 +231,40 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     """Chat room serializer"""
     participants = UserBasicSerializer(many=True, read_only=True)
     created_by = UserBasicSerializer(read_only=True)
-    last_message = MessageSerializer(read_only=True)
     memberships = RoomMembershipSerializer(many=True, read_only=True)
     participant_count = serializers.SerializerMethodField()
-    avatar_url = serializers.SerializerMethodField()
+    avatar_url = serializers.CharField(source='avatar.url', read_only=True, allow_null=True)
     
     class Meta:
         model = ChatRoom
         fields = [
             'id', 'name', 'room_type', 'participants', 'created_by',
             'created_at', 'updated_at', 'is_active', 'description',
-            'avatar_url', 'last_message', 'memberships', 'participant_count'
+            'avatar_url', 'last_message_preview', 'last_message_sender',
+            'last_message_timestamp', 'memberships', 'participant_count'
         ]
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+    
+    # Heavy nested fields only rendered when asked for via ?include=
+    OPTIONAL_FIELDS = ('memberships',)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        includes = self.requested_includes(self.context.get('request'))
+        for field_name in self.OPTIONAL_FIELDS:
+            if field_name not in includes:
+                self.fields.pop(field_name, None)
+    
+    @staticmethod
+    def requested_includes(request):
+        """Parse ?include=memberships into a set of field names"""
+        if request is None:
+            return set()
+        include = request.query_params.get('include', '')
+        return {name.strip() for name in include.split(',') if name.strip()}
         
     def get_participant_count(self, obj):
         return obj.participants.count()
-        
-    def get_avatar_url(self, obj):
-        if obj.avatar:
-            return obj.avatar.url
-        return None
 
 class ChatRoomCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating chat rooms"""
@@ -258,10 +342,10 @@ class FileUploadSerializer(serializers.Serializer):
     encryption_key_id = serializers.CharField(required=False, allow_blank=True)
     
     def validate_file(self, value):
-        # Validate file size (50MB max)
-        max_size = 50 * 1024 * 1024  # 50MB
+        # Validate file size (50MB max); FileUploadView also rejects on Content-Length
+        max_size = settings.CHAT_SETTINGS['MAX_FILE_SIZE']
         if value.size > max_size:
-            raise serializers.ValidationError("File size cannot exceed 50MB")
+            raise serializers.ValidationError(f"File size cannot exceed {max_size // (1024 * 1024)}MB")
         return value
 
 class RoomInviteSerializer(serializers.Serializer):
@@ -282,7 +366,7 @@ class RoomInviteSerializer(serializers.Serializer):
 class UserSearchSerializer(serializers.ModelSerializer):
     """Enhanced serializer for user search results with profile context"""
     avatar_url = serializers.SerializerMethodField()
-    is_online = serializers.SerializerMethodField()
+    is_online = serializers.BooleanField(source='_is_online', read_only=True, default=False)
     profile_summary = serializers.SerializerMethodField()
     
     class Meta:
@@ -298,48 +382,34 @@ class UserSearchSerializer(serializers.ModelSerializer):
             return obj.avatar.url
             
         # Check profile-specific avatar
-        try:
-            if obj.user_type == 'talent' and hasattr(obj, 'talent_profile'):
-                if obj.talent_profile.profile_picture:
-                    return obj.talent_profile.profile_picture.url
-            elif obj.user_type == 'mentor' and hasattr(obj, 'mentor_profile'):
-                if obj.mentor_profile.profile_picture:
-                    return obj.mentor_profile.profile_picture.url
-        except:
-            pass
+        profile = _user_profile(obj)
+        if profile is not None and profile.profile_picture:
+            return profile.profile_picture.url
             
         return None
         
-    def get_is_online(self, obj):
-        try:
-            return obj.presence.status == 'online'
-        except:
-            return False
-    
     def get_profile_summary(self, obj):
         """Get brief profile summary for search context"""
-        try:
-            if obj.user_type == 'talent' and hasattr(obj, 'talent_profile'):
-                profile = obj.talent_profile
-                sports = profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else []
-                return {
-                    'sports': sports,
-                    'experience_years': profile.experience_years,
-                    'is_verified': profile.is_verified,
-                    'location': f"{profile.city}, {profile.state}" if profile.city and profile.state else None
-                }
-            elif obj.user_type == 'mentor' and hasattr(obj, 'mentor_profile'):
-                profile = obj.mentor_profile
-                sports = profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else []
-                return {
-                    'sports': sports,
-                    'coaching_experience': profile.coaching_experience_years,
-                    'coaching_level': profile.coaching_levels,
-                    'is_verified': profile.is_verified,
-                    'is_available': profile.is_available,
-                    'location': f"{profile.city}, {profile.state}" if profile.city and profile.state else None
-                }
-        except:
-            pass
-            
-        return {}
+        profile = _user_profile(obj)
+        if profile is None:
+            return {}
+        
+        sports = profile.selected_sports[:3] if isinstance(profile.selected_sports, list) else []
+        # Search summaries only show a structured "City, State" location, which is
+        # what location_display holds whenever both are set
+        location = profile.location_display if profile.city and profile.state else None
+        if obj.user_type == 'talent':
+            return {
+                'sports': sports,
+                'experience_years': profile.experience_years,
+                'is_verified': profile.is_verified,
+                'location': location
+            }
+        return {
+            'sports': sports,
+            'coaching_experience': profile.coaching_experience_years,
+            'coaching_level': profile.coaching_levels,
+            'is_verified': profile.is_verified,
+            'is_available': profile.is_available,
+            'location': location
+        }
@@ -0,0 +1,63 @@
+"""
+Lock-striped dictionary for Socket.IO session bookkeeping.
+
+Connect/disconnect handlers mutate the session maps while every event handler
+reads them. Instead of one lock around a single dict, keys are hashed into a
+fixed number of shards, each with its own lock, so writers for different users
+rarely contend.
+"""
+
+import threading
+
+
+class ShardedDict:
+    """Dict-like mapping split across independently locked shards"""
+
+    def __init__(self, shards=16):
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _index(self, key):
+        return hash(key) % len(self._shards)
+
+    def get(self, key, default=None):
+        # Single dict lookups are atomic; readers never take the lock
+        return self._shards[self._index(key)].get(key, default)
+
+    def set(self, key, value):
+        index = self._index(key)
+        with self._locks[index]:
+            self._shards[index][key] = value
+
+    def pop(self, key, default=None):
+        index = self._index(key)
+        with self._locks[index]:
+            return self._shards[index].pop(key, default)
+
+    def items_snapshot(self):
+        """List of (key, value) pairs, taking each shard's lock in turn"""
+        items = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                items.extend(shard.items())
+        return items
+
+    def keys_snapshot(self):
+        return [key for key, _ in self.items_snapshot()]
+
+    def __getitem__(self, key):
+        return self._shards[self._index(key)][key]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        index = self._index(key)
+        with self._locks[index]:
+            del self._shards[index][key]
+
+    def __contains__(self, key):
+        return key in self._shards[self._index(key)]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
@@ -1,11 +1,12 @@
 """
 Django signals to automatically create chat rooms when mentor selects talent
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from core.models import MentorTalentSelection
 from .models import ChatRoom, RoomMembership
+from .room_access import invalidate_room_access
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,18 +23,14 @@ def create_mentor_talent_chat_room(sender, instance, created, **kwargs):
             talent_user = instance.talent
             
             # Check if a chat room already exists between these users
-            existing_room = ChatRoom.objects.filter(
-                room_type='private',
-                participants=mentor_user
-            ).filter(
-                participants=talent_user
-            ).first()
+            existing_room = ChatRoom.get_private_room(mentor_user.id, talent_user.id)
             
             if not existing_room:
                 # Create new private chat room
                 room = ChatRoom.objects.create(
                     name=f"Mentor-Talent Chat: {mentor_user.get_full_name()} & {talent_user.get_full_name()}",
                     room_type='private',
+                    private_room_key=ChatRoom.private_room_key_for(mentor_user.id, talent_user.id),
                     created_by=mentor_user,
                     description=f"Private chat between mentor {mentor_user.get_full_name()} and talent {talent_user.get_full_name()}"
                 )
@@ -64,3 +61,23 @@ def create_mentor_talent_chat_room(sender, instance, created, **kwargs):
                 
         except Exception as e:
             logger.error(f"Error creating mentor-talent chat room: {str(e)}")
+
+
+@receiver(m2m_changed, sender=ChatRoom.participants.through)
+def revoke_room_access_on_participant_removal(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop cached socket room access whenever participants are removed
+    (leaving a room, admin edits, set()/clear() from either side)
+    """
+    if action == 'pre_clear':
+        # pk_set is None for clears, so collect the pairs before the rows go
+        if reverse:
+            pairs = [(instance.pk, room_id) for room_id in instance.chat_rooms.values_list('id', flat=True)]
+        else:
+            pairs = [(user_id, instance.pk) for user_id in instance.participants.values_list('id', flat=True)]
+    elif action == 'post_remove':
+        pairs = [(instance.pk, pk) if reverse else (pk, instance.pk) for pk in pk_set]
+    else:
+        return
+    for user_id, room_id in pairs:
+        invalidate_room_access(user_id, room_id)
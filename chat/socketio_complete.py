@@ -4,35 +4,92 @@ No Redis required - perfect for single-server deployment
 """
 
 import socketio
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
 import json
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.db.models import OuterRef, Prefetch, Subquery
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
 from .models import ChatRoom, Message, UserPresence, MessageStatus, RoomMembership
+from .message_cache import invalidate_cached_message
+from .room_access import has_room_access
+from .fast_json import OrjsonShim
+from .sharded_dict import ShardedDict
+from .batch_emitter import BatchEmitter
 from notifications.utils import send_new_message_notification
 import logging
 import uuid
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from cachetools import TTLCache
+from django.conf import settings
+from django.db import close_old_connections, transaction
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 # Create Socket.IO server (no Redis needed for single-server deployment)
 sio = socketio.Server(
+    async_mode=settings.CHAT_SETTINGS.get('SOCKETIO_ASYNC_MODE', 'threading'),
     cors_allowed_origins=["*"],
     cors_credentials=True,
-    logger=True,  # Enable logging for debugging
-    engineio_logger=True,
+    logger=settings.CHAT_SETTINGS.get('SOCKETIO_DEBUG_LOGGING', False),
+    engineio_logger=settings.CHAT_SETTINGS.get('SOCKETIO_DEBUG_LOGGING', False),
     ping_timeout=60,
     ping_interval=25,
     allow_upgrades=True,
-    transports=['polling', 'websocket']
+    transports=['polling', 'websocket'],
+    json=OrjsonShim  # encodes datetimes natively, so payloads carry them unformatted
 )
 
 # In-memory storage for user sessions and rooms
-user_sessions = {}  # {user_id: {'session_id': sid, 'room_ids': set(), 'user': user_obj}}
-room_sessions = {}  # {room_id: {session_ids}}
+user_sessions = ShardedDict()  # {user_id: {'session_id': sid, 'room_ids': set(), 'user': user_obj}}
+room_sessions = {}  # {room_id: (session_ids,)}, immutable snapshots replaced on mutation
+sid_to_user = {}  # {session_id: user_obj}, reverse index of user_sessions; filled on connect, popped on disconnect
+user_id_to_sid = ShardedDict()  # {str(user_id): session_id}, keyed by str so client-supplied ids need no coercion
+_room_sessions_lock = threading.Lock()  # serializes writers only; readers use the snapshot
+batch_capable_sids = set()  # sessions that asked for the 'batch' envelope on connect (auth['batch_events'])
+
+# Typing state is written to UserPresence at most once per interval per user:
+# {user_id: (room_id, monotonic time of last write)}
+TYPING_DB_WRITE_INTERVAL = 3
+_typing_last_write = {}
+
+def user_room(user_id):
+    """Name of the Socket.IO room every session of a user joins on connect"""
+    return f"user:{user_id}"
+
+def add_room_session(room_id, sid):
+    """Record sid as a member of room_id"""
+    with _room_sessions_lock:
+        sids = room_sessions.get(room_id, ())
+        if sid not in sids:
+            room_sessions[room_id] = sids + (sid,)
+
+def remove_room_session(room_id, sid):
+    """Forget sid as a member of room_id, dropping the room once empty"""
+    with _room_sessions_lock:
+        sids = tuple(s for s in room_sessions.get(room_id, ()) if s != sid)
+        if sids:
+            room_sessions[room_id] = sids
+        else:
+            room_sessions.pop(room_id, None)
+
+# Validated tokens: {sha256(token)[:16]: (user, exp)}. Entries also expire at the
+# token's own exp claim, so a cached token is never honoured past its lifetime,
+# and the 300s TTL bounds how long a since-deactivated account keeps connecting.
+_token_cache = TTLCache(maxsize=10000, ttl=300)
+_token_cache_lock = threading.Lock()
 
 def authenticate_user(token):
     """Authenticate user from JWT token"""
@@ -43,64 +100,183 @@ def authenticate_user(token):
         # Remove Bearer prefix if present
         if token.startswith('Bearer '):
             token = token[7:]
+        
+        token_key = hashlib.sha256(token.encode()).digest()[:16]
+        with _token_cache_lock:
+            cached = _token_cache.get(token_key)
+        if cached is not None:
+            user, exp = cached
+            if exp > time.time():
+                return user
+            with _token_cache_lock:
+                _token_cache.pop(token_key, None)
             
-        jwt_auth = JWTAuthentication()
+        # Build the user from the token claims (id, username, user_type, ...)
+        # instead of fetching the User row on every connect
+        jwt_auth = JWTStatelessUserAuthentication()
         validated_token = jwt_auth.get_validated_token(token)
         user = jwt_auth.get_user(validated_token)
+        
+        # The claims can't say whether the account was deactivated since the
+        # token was issued, so check once per token; a deactivated user is
+        # still let back in for at most the cache's 300s TTL
+        is_active = User.objects.filter(id=user.id).values_list('is_active', flat=True).first()
+        if not is_active:
+            logger.warning("Rejected socket token for inactive or missing user %s", user.id)
+            return None
+        
+        # Only valid tokens of active users reach this point; cache them until exp
+        exp = validated_token.get('exp')
+        if exp:
+            with _token_cache_lock:
+                _token_cache[token_key] = (user, exp)
         return user
     except (InvalidToken, TokenError, Exception) as e:
-        logger.error(f"Authentication error: {str(e)}")
+        logger.error("Authentication error: %s", e)
         return None
 
+# Non-critical broadcasts (typing, invitations, notifications) are coalesced
+# into one 'batch' emit per room every BROADCAST_FLUSH_INTERVAL seconds (or once
+# BROADCAST_MAX_BATCH events queue up) for clients that opted in on connect;
+# everyone else still receives the named events. See BatchEmitter. Message events
+# (new_message, new_file, message_edited, message_deleted) and control replies
+# to a single sid ('error', 'connected', ...) are emitted directly.
+BROADCAST_FLUSH_INTERVAL = 0.015
+BROADCAST_MAX_BATCH = 100
+broadcast_emitter = BatchEmitter(
+    sio, interval=BROADCAST_FLUSH_INTERVAL, max_batch=BROADCAST_MAX_BATCH,
+    accepts_batch=batch_capable_sids.__contains__
+)
+
+def queue_room_event(room_id, event, payload, skip_sid=None):
+    """Queue an event for the next batched broadcast to room_id (or a list of rooms)"""
+    broadcast_emitter.queue(event, payload, room_id, skip_sid=skip_sid)
+
+# Message persistence runs on a small worker pool so handlers return without
+# waiting on Postgres; the sender gets 'message_saved' and the room the message
+# itself once the row is stored.
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.CHAT_SETTINGS.get('SOCKET_DB_WORKERS', 4),
+    thread_name_prefix='chat-db'
+)
+
+def run_db_task(func, *args, **kwargs):
+    """Run func on the DB worker pool, recycling stale connections afterwards"""
+    def task():
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.error("Background DB task %s failed: %s", func.__name__, e)
+        finally:
+            close_old_connections()
+    return _db_executor.submit(task)
+
+# ChatRoom.updated_at and the last-message snapshot are debounced: busy rooms
+# get one UPDATE per ROOM_TOUCH_FLUSH_INTERVAL instead of one per message.
+# Only room ids are queued; the flush reads each room's current latest message
+# in the UPDATE itself, so edits and deletes made inside the window still win.
+ROOM_TOUCH_FLUSH_INTERVAL = 2
+pending_room_touch = set()  # {room_id}
+_room_touch_lock = threading.Lock()
+_room_touch_flusher_started = False
+
+def schedule_room_touch(message):
+    """Mark message's room for the next _flush_room_touches"""
+    global _room_touch_flusher_started
+    with _room_touch_lock:
+        pending_room_touch.add(message.room_id)
+        if not _room_touch_flusher_started:
+            _room_touch_flusher_started = True
+            sio.start_background_task(_flush_room_touches)
+
+def _flush_room_touches():
+    """Background task: write pending room touches in one bulk UPDATE"""
+    while True:
+        sio.sleep(ROOM_TOUCH_FLUSH_INTERVAL)
+        with _room_touch_lock:
+            if not pending_room_touch:
+                continue
+            room_ids = list(pending_room_touch)
+            pending_room_touch.clear()
+        # Same row sync_room_preview() matches on: the room's newest message,
+        # soft-deleted or not (a deleted one previews as NULL)
+        latest = Message.objects.filter(room_id=OuterRef('pk')).order_by('-timestamp')
+        try:
+            ChatRoom.objects.filter(pk__in=room_ids).update(
+                updated_at=timezone.now(),
+                last_message_preview=Subquery(latest.values('encrypted_content')[:1]),
+                last_message_sender=Subquery(latest.values('sender_id')[:1]),
+                last_message_timestamp=Subquery(latest.values('timestamp')[:1])
+            )
+        except Exception as e:
+            logger.error("Room touch flush error: %s", e)
+        finally:
+            close_old_connections()
+
+def client_msg_ref(data):
+    """Opaque client correlation id from a payload, echoed back but never used as a key"""
+    value = data.get('client_msg_id')
+    return str(value)[:64] if value else None
+
 def get_user_from_session(sid):
-    """Get user object from session ID"""
-    for user_id, session_data in user_sessions.items():
-        if session_data['session_id'] == sid:
-            return session_data['user']
-    return None
+    """Get user object from session ID (in-memory; no DB or session-table walk)"""
+    return sid_to_user.get(sid)
 
 @sio.event
 def connect(sid, environ, auth):
     """Handle client connection"""
     try:
-        logger.info(f"Connection attempt from {sid}")
+        logger.info("Connection attempt from %s", sid)
         
         # Get token from auth data
         token = auth.get('token') if auth else None
         user = authenticate_user(token)
         
         if not user or isinstance(user, AnonymousUser):
-            logger.warning(f"Unauthorized connection attempt: {sid}")
+            logger.warning("Unauthorized connection attempt: %s", sid)
             sio.disconnect(sid)
             return False
             
         # Store user session
-        user_sessions[user.id] = {
+        user_sessions.set(user.id, {
             'session_id': sid,
             'room_ids': set(),
             'user': user
-        }
+        })
+        sid_to_user[sid] = user
+        user_id_to_sid.set(str(user.id), sid)
+        batch_events = bool(auth.get('batch_events'))
+        if batch_events:
+            batch_capable_sids.add(sid)
+        
+        # Personal room, so per-user events fan out in a single emit
+        sio.enter_room(sid, user_room(user.id))
         
         # Set user as online
         try:
-            presence, created = UserPresence.objects.get_or_create(user=user)
-            presence.set_online()
+            updated = UserPresence.objects.filter(user_id=user.id).update(
+                status='online',
+                last_seen=timezone.now()
+            )
+            if not updated:
+                UserPresence.objects.get_or_create(user_id=user.id, defaults={'status': 'online'})
         except Exception as e:
-            logger.error(f"Error setting user online: {str(e)}")
+            logger.error("Error setting user online: %s", e)
         
-        logger.info(f"User {user.username} connected with session {sid}")
+        logger.info("User %s connected with session %s", user.username, sid)
         
         # Send success response
         sio.emit('connected', {
             'status': 'success', 
             'user_id': str(user.id),
+            'batch_events': batch_events,
             'message': 'Successfully connected to Vauice Chat'
         }, room=sid)
         
         return True
         
     except Exception as e:
-        logger.error(f"Connection error: {str(e)}")
+        logger.error("Connection error: %s", e)
         sio.disconnect(sid)
         return False
 
@@ -109,23 +285,30 @@ def disconnect(sid):
     """Handle client disconnection"""
     try:
         # Find and remove user session
-        user_id_to_remove = None
-        user = None
-        
-        for user_id, session_data in user_sessions.items():
-            if session_data['session_id'] == sid:
-                user_id_to_remove = user_id
-                user = session_data['user']
-                break
-                
-        if user_id_to_remove:
-            user_data = user_sessions[user_id_to_remove]
-            
-            # Leave all rooms and notify other users
-            for room_id in user_data['room_ids'].copy():
-                if room_id in room_sessions:
-                    room_sessions[room_id].discard(sid)
-                    # Notify other users in room
+        user = sid_to_user.pop(sid, None)
+        batch_capable_sids.discard(sid)
+        user_id_to_remove = user.id if user else None
+        user_data = user_sessions.get(user_id_to_remove)
+        
+        # Ignore stale sids whose user has since reconnected with a new session
+        if user_data and user_data['session_id'] == sid:
+            # Leave all rooms; the session is dropped below, so nothing else
+            # mutates room_ids while we iterate it
+            room_ids = list(user_data['room_ids'])
+            for room_id in room_ids:
+                remove_room_session(room_id, sid)
+            
+            # Notify other users once across all their rooms; a client sharing
+            # several rooms with the user receives a single event
+            if room_ids:
+                sio.emit('user_left_rooms', {
+                    'user_id': str(user.id),
+                    'username': user.username,
+                    'room_ids': room_ids
+                }, room=room_ids)
+                # Deprecated per-room event, kept in its original shape until
+                # clients have moved to user_left_rooms
+                for room_id in room_ids:
                     sio.emit('user_left', {
                         'user_id': str(user.id),
                         'username': user.username,
@@ -133,20 +316,24 @@ def disconnect(sid):
                     }, room=room_id)
             
             # Set user as offline
+            _typing_last_write.pop(user_id_to_remove, None)
             try:
-                presence = UserPresence.objects.get(user=user)
-                presence.set_offline()
-            except UserPresence.DoesNotExist:
-                pass
+                UserPresence.objects.filter(user_id=user_id_to_remove).update(
+                    status='offline',
+                    last_seen=timezone.now(),
+                    is_typing_in=None,
+                    typing_started_at=None
+                )
             except Exception as e:
-                logger.error(f"Error setting user offline: {str(e)}")
+                logger.error("Error setting user offline: %s", e)
             
             # Remove user session
-            del user_sessions[user_id_to_remove]
-            logger.info(f"User {user.username} disconnected")
+            user_sessions.pop(user_id_to_remove, None)
+            user_id_to_sid.pop(str(user_id_to_remove), None)
+            logger.info("User %s disconnected", user.username)
             
     except Exception as e:
-        logger.error(f"Disconnect error: {str(e)}")
+        logger.error("Disconnect error: %s", e)
 
 @sio.event
 def join_room(sid, data):
@@ -163,9 +350,7 @@ def join_room(sid, data):
             return
             
         # Check room access
-        try:
-            room = ChatRoom.objects.get(id=room_id, participants=user)
-        except ChatRoom.DoesNotExist:
+        if not has_room_access(user.id, room_id):
             sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
             return
             
@@ -173,9 +358,7 @@ def join_room(sid, data):
         sio.enter_room(sid, room_id)
         
         # Track room membership
-        if room_id not in room_sessions:
-            room_sessions[room_id] = set()
-        room_sessions[room_id].add(sid)
+        add_room_session(room_id, sid)
         user_sessions[user.id]['room_ids'].add(room_id)
         
         # Notify others in room that user joined
@@ -192,10 +375,10 @@ def join_room(sid, data):
             'message': f'Successfully joined room {room_id}'
         }, room=sid)
         
-        logger.info(f"User {user.username} joined room {room_id}")
+        logger.info("User %s joined room %s", user.username, room_id)
         
     except Exception as e:
-        logger.error(f"Join room error: {str(e)}")
+        logger.error("Join room error: %s", e)
         sio.emit('error', {'message': 'Failed to join room'}, room=sid)
 
 @sio.event
@@ -214,10 +397,10 @@ def leave_room(sid, data):
         sio.leave_room(sid, room_id)
         
         # Update tracking
-        if room_id in room_sessions:
-            room_sessions[room_id].discard(sid)
-        if user.id in user_sessions:
-            user_sessions[user.id]['room_ids'].discard(room_id)
+        remove_room_session(room_id, sid)
+        user_data = user_sessions.get(user.id)
+        if user_data:
+            user_data['room_ids'].discard(room_id)
         
         # Notify others that user left
         sio.emit('user_left', {
@@ -226,10 +409,13 @@ def leave_room(sid, data):
             'room_id': room_id
         }, room=room_id)
         
-        logger.info(f"User {user.username} left room {room_id}")
+        logger.info("User %s left room %s", user.username, room_id)
         
     except Exception as e:
-        logger.error(f"Leave room error: {str(e)}")
+        logger.error("Leave room error: %s", e)
+
+# Constant keys of the new_message payload; send_message copies and fills it
+_NEW_MESSAGE_TEMPLATE = {'type': 'new_message', 'is_edited': False}
 
 @sio.event
 def send_message(sid, data):
@@ -251,72 +437,116 @@ def send_message(sid, data):
             return
             
         # Verify room access
-        try:
-            room = ChatRoom.objects.get(id=room_id, participants=user)
-        except ChatRoom.DoesNotExist:
+        if not has_room_access(user.id, room_id):
             sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
             return
-            
-        # Handle reply-to message
-        reply_to = None
+        
+        # The primary key is always generated here; client_msg_id only lets the
+        # sender match the stored message to its optimistic copy
+        message_id = uuid.uuid4()
+        client_msg_id = client_msg_ref(data)
+        
+        # Persist on the worker pool; the room broadcast goes out once the row exists
+        run_db_task(
+            persist_message, sid, message_id, client_msg_id, room_id, user,
+            encrypted_content, content_hash, message_type, reply_to_id
+        )
+        
+        logger.info("Message sent by %s in room %s", user.username, room_id)
+        
+    except Exception as e:
+        logger.error("Send message error: %s", e)
+        sio.emit('error', {'message': 'Failed to send message'}, room=sid)
+
+def create_delivery_statuses(message, sender_id):
+    """Mark a new message delivered for every other participant in one upsert"""
+    participant_ids = list(
+        ChatRoom.participants.through.objects.filter(
+            chatroom_id=message.room_id
+        ).exclude(
+            user_id=sender_id
+        ).values_list('user_id', flat=True)
+    )
+    MessageStatus.bulk_upsert_status(message.id, participant_ids, 'delivered')
+
+def persist_message(sid, message_id, client_msg_id, room_id, user, encrypted_content, content_hash, message_type, reply_to_id):
+    """Store a message, broadcast it to the room, fan out delivery statuses and notify the sender"""
+    try:
+        # Handle reply-to message: keep the id only if it belongs to this room
         if reply_to_id:
             try:
-                reply_to = Message.objects.get(id=reply_to_id, room=room)
-            except Message.DoesNotExist:
-                pass
+                if not Message.objects.filter(id=reply_to_id, room_id=room_id).exists():
+                    reply_to_id = None
+            except (ValueError, ValidationError):
+                reply_to_id = None
                 
-        # Save message to database
+        # Save message to database (room access was checked by the handler)
         message = Message.objects.create(
-            room=room,
-            sender=user,
+            id=message_id,
+            room_id=room_id,
+            sender_id=user.id,
             encrypted_content=encrypted_content,
             content_hash=content_hash,
             message_type=message_type,
-            reply_to=reply_to
+            reply_to_id=reply_to_id
         )
+    except Exception as e:
+        logger.error("Persist message error: %s", e)
+        # Nothing was broadcast yet, so only the sender has a copy to drop
+        sio.emit('message_failed', {
+            'client_msg_id': client_msg_id,
+            'room_id': room_id
+        }, room=sid)
+        return
+    
+    sio.emit('message_saved', {
+        'message_id': message.id,
+        'client_msg_id': client_msg_id,
+        'room_id': room_id,
+        'timestamp': message.timestamp
+    }, room=sid)
+    
+    # Send to all users in room
+    message_data = _NEW_MESSAGE_TEMPLATE.copy()
+    message_data.update(
+        message_id=message.id,
+        client_msg_id=client_msg_id,
+        room_id=room_id,
+        sender_id=str(user.id),
+        sender_username=user.username,
+        encrypted_content=encrypted_content,
+        content_hash=content_hash,
+        message_type=message_type,
+        timestamp=message.timestamp,
+        reply_to=reply_to_id or None
+    )
+    sio.emit('new_message', message_data, room=room_id)
+    
+    # Update room timestamp and last-message snapshot (debounced)
+    schedule_room_touch(message)
+    
+    # Update message statuses for other participants
+    create_delivery_statuses(message, user.id)
         
-        # Update room timestamp
-        room.updated_at = timezone.now()
-        room.save()
-        
-        # Create message data for broadcast
-        message_data = {
-            'type': 'new_message',
-            'message_id': str(message.id),
-            'room_id': str(room.id),
-            'sender_id': str(user.id),
-            'sender_username': user.username,
-            'encrypted_content': encrypted_content,
-            'content_hash': content_hash,
-            'message_type': message_type,
-            'timestamp': message.timestamp.isoformat(),
-            'is_edited': False,
-            'reply_to': str(reply_to.id) if reply_to else None
-        }
-        
-        # Send to all users in room
-        sio.emit('new_message', message_data, room=room_id)
-        
-        # Update message statuses for other participants
-        room_participants = room.participants.exclude(id=user.id)
-        for participant in room_participants:
-            MessageStatus.objects.update_or_create(
-                message=message,
-                user=participant,
-                defaults={'status': 'delivered'}
-            )
-            
-        # Send push notification
-        try:
-            send_new_message_notification(message)
-        except Exception as e:
-            logger.error(f"Error sending notification: {str(e)}")
-            
-        logger.info(f"Message sent by {user.username} in room {room_id}")
-        
+    # Send push notification
+    try:
+        send_new_message_notification(message)
     except Exception as e:
-        logger.error(f"Send message error: {str(e)}")
-        sio.emit('error', {'message': 'Failed to send message'}, room=sid)
+        logger.error("Error sending notification: %s", e)
+
+@lru_cache(maxsize=4096)
+def typing_payload(user_id, username, room_id, is_typing):
+    """
+    Shared typing_indicator payload. Clients resend typing events every few
+    hundred ms, so the same dict is reused instead of rebuilt; it is only ever
+    read (serialized), never mutated.
+    """
+    return {
+        'user_id': str(user_id),
+        'username': username,
+        'is_typing': is_typing,
+        'room_id': room_id
+    }
 
 @sio.event
 def start_typing(sid, data):
@@ -329,25 +559,29 @@ def start_typing(sid, data):
         user = get_user_from_session(sid)
         if not user:
             return
+        
+        # Only participants may signal typing in (or record it against) a room
+        if not has_room_access(user.id, room_id):
+            return
             
-        # Update typing status in database
-        try:
-            presence, created = UserPresence.objects.get_or_create(user=user)
-            room = ChatRoom.objects.get(id=room_id)
-            presence.start_typing(room)
-        except Exception as e:
-            logger.error(f"Error updating typing status: {str(e)}")
+        # Update typing status in database, at most once per interval per room
+        now = time.monotonic()
+        last_room_id, last_write = _typing_last_write.get(user.id, (None, 0))
+        if last_room_id != room_id or now - last_write > TYPING_DB_WRITE_INTERVAL:
+            _typing_last_write[user.id] = (room_id, now)
+            try:
+                UserPresence.objects.filter(user_id=user.id).update(
+                    is_typing_in_id=room_id,
+                    typing_started_at=timezone.now()
+                )
+            except Exception as e:
+                logger.error("Error updating typing status: %s", e)
             
-        # Broadcast typing indicator to other users in room
-        sio.emit('typing_indicator', {
-            'user_id': str(user.id),
-            'username': user.username,
-            'is_typing': True,
-            'room_id': room_id
-        }, room=room_id, skip_sid=sid)
+        # Broadcast typing indicator to the rest of the room
+        queue_room_event(room_id, 'typing_indicator', typing_payload(user.id, user.username, room_id, True), skip_sid=sid)
         
     except Exception as e:
-        logger.error(f"Start typing error: {str(e)}")
+        logger.error("Start typing error: %s", e)
 
 @sio.event
 def stop_typing(sid, data):
@@ -360,26 +594,25 @@ def stop_typing(sid, data):
         user = get_user_from_session(sid)
         if not user:
             return
+        
+        if not has_room_access(user.id, room_id):
+            return
             
-        # Update typing status in database
-        try:
-            presence = UserPresence.objects.get(user=user)
-            presence.stop_typing()
-        except UserPresence.DoesNotExist:
-            pass
-        except Exception as e:
-            logger.error(f"Error updating typing status: {str(e)}")
+        # Clear typing status in database, unless it was never written
+        if _typing_last_write.pop(user.id, None):
+            try:
+                UserPresence.objects.filter(user_id=user.id).update(
+                    is_typing_in=None,
+                    typing_started_at=None
+                )
+            except Exception as e:
+                logger.error("Error updating typing status: %s", e)
             
-        # Broadcast typing stopped to other users in room
-        sio.emit('typing_indicator', {
-            'user_id': str(user.id),
-            'username': user.username,
-            'is_typing': False,
-            'room_id': room_id
-        }, room=room_id, skip_sid=sid)
+        # Broadcast typing stopped to the rest of the room
+        queue_room_event(room_id, 'typing_indicator', typing_payload(user.id, user.username, room_id, False), skip_sid=sid)
         
     except Exception as e:
-        logger.error(f"Stop typing error: {str(e)}")
+        logger.error("Stop typing error: %s", e)
 
 @sio.event
 def mark_messages_read(sid, data):
@@ -394,22 +627,12 @@ def mark_messages_read(sid, data):
             return
             
         # Update message statuses
-        messages = Message.objects.filter(
-            id__in=message_ids,
-            room__participants=user
-        )
-        
-        for message in messages:
-            MessageStatus.objects.update_or_create(
-                message=message,
-                user=user,
-                defaults={'status': 'read'}
-            )
+        marked = MessageStatus.mark_read(user, message_ids)
             
-        logger.info(f"User {user.username} marked {len(messages)} messages as read")
+        logger.info("User %s marked %s messages as read", user.username, marked)
         
     except Exception as e:
-        logger.error(f"Mark messages read error: {str(e)}")
+        logger.error("Mark messages read error: %s", e)
 
 @sio.event
 def edit_message(sid, data):
@@ -432,7 +655,7 @@ def edit_message(sid, data):
         try:
             message = Message.objects.get(
                 id=message_id,
-                sender=user,
+                sender_id=user.id,
                 is_deleted=False
             )
         except Message.DoesNotExist:
@@ -444,24 +667,25 @@ def edit_message(sid, data):
         message.content_hash = new_content_hash
         message.is_edited = True
         message.edited_at = timezone.now()
-        message.save()
+        message.save(update_fields=['encrypted_content', 'content_hash', 'is_edited', 'edited_at'])
+        run_db_task(message.sync_room_preview)
         
         # Broadcast update to room
         message_data = {
             'type': 'message_edited',
-            'message_id': str(message.id),
-            'room_id': str(message.room.id),
+            'message_id': message.id,
+            'room_id': message.room_id,
             'encrypted_content': new_encrypted_content,
             'content_hash': new_content_hash,
-            'edited_at': message.edited_at.isoformat()
+            'edited_at': message.edited_at
         }
         
-        sio.emit('message_edited', message_data, room=str(message.room.id))
+        sio.emit('message_edited', message_data, room=message.room_id)
         
-        logger.info(f"Message {message_id} edited by {user.username}")
+        logger.info("Message %s edited by %s", message_id, user.username)
         
     except Exception as e:
-        logger.error(f"Edit message error: {str(e)}")
+        logger.error("Edit message error: %s", e)
         sio.emit('error', {'message': 'Failed to edit message'}, room=sid)
 
 @sio.event
@@ -483,7 +707,7 @@ def delete_message(sid, data):
         try:
             message = Message.objects.get(
                 id=message_id,
-                sender=user,
+                sender_id=user.id,
                 is_deleted=False
             )
         except Message.DoesNotExist:
@@ -492,21 +716,22 @@ def delete_message(sid, data):
             
         # Soft delete message
         message.soft_delete()
+        run_db_task(invalidate_cached_message, message)
         
         # Broadcast deletion to room
         delete_data = {
             'type': 'message_deleted',
-            'message_id': str(message.id),
-            'room_id': str(message.room.id),
+            'message_id': message.id,
+            'room_id': message.room_id,
             'deleted_by': str(user.id)
         }
         
-        sio.emit('message_deleted', delete_data, room=str(message.room.id))
+        sio.emit('message_deleted', delete_data, room=message.room_id)
         
-        logger.info(f"Message {message_id} deleted by {user.username}")
+        logger.info("Message %s deleted by %s", message_id, user.username)
         
     except Exception as e:
-        logger.error(f"Delete message error: {str(e)}")
+        logger.error("Delete message error: %s", e)
         sio.emit('error', {'message': 'Failed to delete message'}, room=sid)
 
 @sio.event
@@ -517,35 +742,38 @@ def get_online_users(sid, data):
         if not user:
             return
             
-        # Get all online users that share rooms with current user
-        user_rooms = ChatRoom.objects.filter(participants=user)
-        shared_users = User.objects.filter(chat_rooms__in=user_rooms).distinct()
-        
-        online_users = []
-        for shared_user in shared_users:
-            if shared_user.id in user_sessions:
-                online_users.append({
-                    'user_id': str(shared_user.id),
-                    'username': shared_user.username,
-                    'is_online': True
-                })
+        # Get all online users that share rooms with current user; the
+        # connected-user set is pushed into SQL instead of filtered in Python
+        online_ids = user_sessions.keys_snapshot()
+        shared_users = User.objects.filter(
+            chat_rooms__participants=user.id,
+            id__in=online_ids
+        ).values('id', 'username').distinct()
+        
+        online_users = [
+            {
+                'user_id': str(shared_user['id']),
+                'username': shared_user['username'],
+                'is_online': True
+            }
+            for shared_user in shared_users
+        ]
                 
         sio.emit('online_users', {'users': online_users}, room=sid)
         
     except Exception as e:
-        logger.error(f"Get online users error: {str(e)}")
+        logger.error("Get online users error: %s", e)
 
 @sio.event
 def upload_file(sid, data):
-    """Handle file upload for messages"""
+    """
+    Handle file upload for messages (legacy: file travels base64-encoded over
+    the socket). Prefer request_upload_url + file_uploaded.
+    """
     try:
         room_id = data.get('room_id')
         file_data = data.get('file_data')  # Base64 encoded file
         file_name = data.get('file_name')
-        file_type = data.get('file_type')
-        file_size = data.get('file_size')
-        is_encrypted = data.get('is_encrypted', True)
-        encryption_key_id = data.get('encryption_key_id')
         
         if not room_id or not file_data or not file_name:
             sio.emit('error', {'message': 'Room ID, file data, and file name required'}, room=sid)
@@ -557,71 +785,230 @@ def upload_file(sid, data):
             return
             
         # Verify room access
-        try:
-            room = ChatRoom.objects.get(id=room_id, participants=user)
-        except ChatRoom.DoesNotExist:
+        if not has_room_access(user.id, room_id):
             sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
             return
-            
-        # Create message for file
-        message = Message.objects.create(
-            room=room,
-            sender=user,
-            message_type='file',
-            encrypted_content=f"File: {file_name}",
-            content_hash=data.get('content_hash', '')
-        )
-        
-        # Create file attachment
-        from .models import MessageAttachment
-        attachment = MessageAttachment.objects.create(
-            message=message,
-            file_name=file_name,
-            file_size=file_size,
-            file_type=file_type,
-            is_encrypted=is_encrypted,
-            encryption_key_id=encryption_key_id
-        )
         
         # For demo purposes, we'll store the file data in the database
         # In production, upload to Cloudinary or S3
         # attachment.file = file_data  # This would be handled by Cloudinary
+        broadcast_file_message(sid, user, room_id, data)
+            
+        logger.info("File uploaded by %s in room %s: %s", user.username, room_id, file_name)
+        
+    except Exception as e:
+        logger.error("File upload error: %s", e)
+        sio.emit('error', {'message': 'Failed to upload file'}, room=sid)
+
+def _upload_folder(room_id, user_id):
+    """Cloudinary folder a user may upload into for a room"""
+    return f"chat/{room_id}/{user_id}"
+
+# Fields a client may send with request_upload_url; anything else is rejected
+UPLOAD_REQUEST_FIELDS = {'room_id', 'request_id', 'file_size'}
+UPLOAD_VERSION_RE = re.compile(r'^\d{1,20}$')
+UPLOAD_PUBLIC_ID_RE = re.compile(r'^[\w\-./]{1,255}$')
+
+@sio.event
+def request_upload_url(sid, data):
+    """
+    Hand the client signed Cloudinary upload parameters so the file goes
+    straight to the object store; only metadata then travels over the socket.
+    """
+    try:
+        if not isinstance(data, dict) or set(data) - UPLOAD_REQUEST_FIELDS:
+            sio.emit('error', {'message': 'Invalid upload request'}, room=sid)
+            return
+        
+        room_id = data.get('room_id')
+        if not room_id:
+            sio.emit('error', {'message': 'Room ID required'}, room=sid)
+            return
         
-        # Update room timestamp
-        room.updated_at = timezone.now()
-        room.save()
-        
-        # Broadcast file message to room
-        file_message_data = {
-            'type': 'file_message',
-            'message_id': str(message.id),
-            'room_id': str(room.id),
-            'sender_id': str(user.id),
-            'sender_username': user.username,
-            'file_name': file_name,
-            'file_type': file_type,
-            'file_size': file_size,
-            'attachment_id': str(attachment.id),
-            'is_encrypted': is_encrypted,
-            'timestamp': message.timestamp.isoformat()
+        max_file_size = settings.CHAT_SETTINGS['MAX_FILE_SIZE']
+        file_size = data.get('file_size')
+        if file_size is not None and (
+            not isinstance(file_size, int) or isinstance(file_size, bool)
+            or not 0 < file_size <= max_file_size
+        ):
+            sio.emit('error', {'message': 'File too large'}, room=sid)
+            return
+            
+        user = get_user_from_session(sid)
+        if not user:
+            sio.emit('error', {'message': 'User not authenticated'}, room=sid)
+            return
+            
+        if not has_room_access(user.id, room_id):
+            sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
+            return
+        
+        cloudinary_settings = settings.CLOUDINARY_STORAGE
+        # The byte limit is part of the signed parameters, so the client cannot
+        # raise it; file_uploaded checks the stored object against it
+        params = {
+            'timestamp': int(time.time()),
+            'folder': _upload_folder(room_id, user.id),
+            'context': f"max_bytes={max_file_size}",
         }
+        signature = cloudinary.utils.api_sign_request(params, cloudinary_settings['API_SECRET'])
         
-        sio.emit('new_file', file_message_data, room=room_id)
+        sio.emit('upload_url', {
+            'request_id': data.get('request_id'),
+            'room_id': room_id,
+            'upload_url': f"https://api.cloudinary.com/v1_1/{cloudinary_settings['CLOUD_NAME']}/raw/upload",
+            'api_key': cloudinary_settings['API_KEY'],
+            'signature': signature,
+            'max_file_size': max_file_size,
+            **params
+        }, room=sid)
         
-        # Update message statuses
-        room_participants = room.participants.exclude(id=user.id)
-        for participant in room_participants:
-            MessageStatus.objects.update_or_create(
-                message=message,
-                user=participant,
-                defaults={'status': 'delivered'}
-            )
+    except Exception as e:
+        logger.error("Request upload URL error: %s", e)
+        sio.emit('error', {'message': 'Failed to prepare upload'}, room=sid)
+
+@sio.event
+def file_uploaded(sid, data):
+    """Record a file the client uploaded directly to Cloudinary as a message"""
+    try:
+        room_id = data.get('room_id')
+        public_id = data.get('public_id')
+        file_name = data.get('file_name')
+        
+        if not room_id or not public_id or not file_name:
+            sio.emit('error', {'message': 'Room ID, public ID, and file name required'}, room=sid)
+            return
+            
+        user = get_user_from_session(sid)
+        if not user:
+            sio.emit('error', {'message': 'User not authenticated'}, room=sid)
+            return
             
-        logger.info(f"File uploaded by {user.username} in room {room_id}: {file_name}")
+        if not has_room_access(user.id, room_id):
+            sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
+            return
+        
+        # Only accept objects from the folder signed for this user and room
+        if (
+            not isinstance(public_id, str)
+            or not UPLOAD_PUBLIC_ID_RE.match(public_id)
+            or '..' in public_id
+            or not public_id.startswith(_upload_folder(room_id, user.id) + '/')
+        ):
+            sio.emit('error', {'message': 'Invalid upload reference'}, room=sid)
+            return
+        
+        version = data.get('version')
+        if version is not None and not UPLOAD_VERSION_RE.match(str(version)):
+            sio.emit('error', {'message': 'Invalid upload version'}, room=sid)
+            return
+        
+        # Trust Cloudinary's record of the object, not the client, for its size
+        try:
+            resource = cloudinary.api.resource(public_id, resource_type='raw')
+        except cloudinary.exceptions.NotFound:
+            sio.emit('error', {'message': 'Invalid upload reference'}, room=sid)
+            return
+        if resource.get('bytes', 0) > settings.CHAT_SETTINGS['MAX_FILE_SIZE']:
+            cloudinary.uploader.destroy(public_id, resource_type='raw')
+            logger.warning("Rejected oversized upload %s from %s", public_id, user.username)
+            sio.emit('error', {'message': 'File too large'}, room=sid)
+            return
+        if version is not None and str(version) != str(resource.get('version')):
+            sio.emit('error', {'message': 'Invalid upload version'}, room=sid)
+            return
+        
+        version = resource.get('version')
+        file_ref = f"raw/upload/v{version}/{public_id}" if version else public_id
+        broadcast_file_message(sid, user, room_id, data, file_ref=file_ref)
+        
+        logger.info("File uploaded by %s in room %s: %s", user.username, room_id, file_name)
         
     except Exception as e:
-        logger.error(f"File upload error: {str(e)}")
-        sio.emit('error', {'message': 'Failed to upload file'}, room=sid)
+        logger.error("File uploaded error: %s", e)
+        sio.emit('error', {'message': 'Failed to record uploaded file'}, room=sid)
+
+def broadcast_file_message(sid, user, room_id, data, file_ref=None):
+    """Queue a file message for persistence; it is broadcast to its room once stored"""
+    file_name = data.get('file_name')
+    file_type = data.get('file_type')
+    file_size = data.get('file_size')
+    is_encrypted = data.get('is_encrypted', True)
+    encryption_key_id = data.get('encryption_key_id')
+    
+    # Server-generated ids; client_msg_id is only echoed back for correlation
+    message_id = uuid.uuid4()
+    attachment_id = uuid.uuid4()
+    
+    run_db_task(
+        persist_file_message, sid, message_id, client_msg_ref(data), attachment_id, room_id, user,
+        file_name, file_type, file_size, is_encrypted, encryption_key_id,
+        data.get('content_hash', ''), file_ref
+    )
+
+def persist_file_message(sid, message_id, client_msg_id, attachment_id, room_id, user, file_name, file_type,
+                         file_size, is_encrypted, encryption_key_id, content_hash, file_ref=None):
+    """Store a file message and its attachment, then broadcast it to the room"""
+    from .models import MessageAttachment
+    try:
+        # Message and attachment land together or not at all (room access was checked by the handler)
+        with transaction.atomic():
+            message = Message.objects.create(
+                id=message_id,
+                room_id=room_id,
+                sender_id=user.id,
+                message_type='file',
+                encrypted_content=f"File: {file_name}",
+                content_hash=content_hash
+            )
+            
+            MessageAttachment.objects.create(
+                id=attachment_id,
+                message=message,
+                file=file_ref,
+                file_name=file_name,
+                file_size=file_size,
+                file_type=file_type,
+                is_encrypted=is_encrypted,
+                encryption_key_id=encryption_key_id
+            )
+    except Exception as e:
+        logger.error("Persist file message error: %s", e)
+        # Nothing was broadcast yet, so only the sender has a copy to drop
+        sio.emit('message_failed', {
+            'client_msg_id': client_msg_id,
+            'room_id': room_id
+        }, room=sid)
+        return
+    
+    sio.emit('message_saved', {
+        'message_id': message.id,
+        'client_msg_id': client_msg_id,
+        'room_id': room_id,
+        'timestamp': message.timestamp
+    }, room=sid)
+    
+    # Broadcast file message to room
+    sio.emit('new_file', {
+        'type': 'file_message',
+        'message_id': message.id,
+        'client_msg_id': client_msg_id,
+        'room_id': room_id,
+        'sender_id': str(user.id),
+        'sender_username': user.username,
+        'file_name': file_name,
+        'file_type': file_type,
+        'file_size': file_size,
+        'attachment_id': attachment_id,
+        'is_encrypted': is_encrypted,
+        'timestamp': message.timestamp
+    }, room=room_id)
+    
+    # Update room timestamp and last-message snapshot (debounced)
+    schedule_room_touch(message)
+    
+    # Update message statuses
+    create_delivery_statuses(message, user.id)
 
 @sio.event  
 def download_file(sid, data):
@@ -643,7 +1030,7 @@ def download_file(sid, data):
             from .models import MessageAttachment
             attachment = MessageAttachment.objects.get(
                 id=attachment_id,
-                message__room__participants=user
+                message__room__participants=user.id
             )
         except MessageAttachment.DoesNotExist:
             sio.emit('error', {'message': 'File not found or access denied'}, room=sid)
@@ -651,7 +1038,7 @@ def download_file(sid, data):
             
         # Send file data back to user
         file_response = {
-            'attachment_id': str(attachment.id),
+            'attachment_id': attachment.id,
             'file_name': attachment.file_name,
             'file_type': attachment.file_type,
             'file_size': attachment.file_size,
@@ -661,10 +1048,10 @@ def download_file(sid, data):
         
         sio.emit('file_download', file_response, room=sid)
         
-        logger.info(f"File download requested by {user.username}: {attachment.file_name}")
+        logger.info("File download requested by %s: %s", user.username, attachment.file_name)
         
     except Exception as e:
-        logger.error(f"File download error: {str(e)}")
+        logger.error("File download error: %s", e)
         sio.emit('error', {'message': 'Failed to download file'}, room=sid)
 
 @sio.event
@@ -685,48 +1072,55 @@ def get_room_history(sid, data):
             return
             
         # Verify room access
-        try:
-            room = ChatRoom.objects.get(id=room_id, participants=user)
-        except ChatRoom.DoesNotExist:
+        if not has_room_access(user.id, room_id):
             sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
             return
             
         # Get messages with pagination
-        messages = Message.objects.filter(
-            room=room,
+        messages = list(Message.objects.filter(
+            room_id=room_id,
             is_deleted=False
-        ).select_related('sender', 'reply_to').order_by('-timestamp')[offset:offset+limit]
+        ).select_related('sender').only(
+            'id', 'sender__id', 'sender__username', 'encrypted_content', 'content_hash',
+            'message_type', 'timestamp', 'is_edited', 'edited_at', 'reply_to_id'
+        ).order_by('-timestamp')[offset:offset+limit])
         
         message_list = []
         for message in reversed(messages):  # Reverse to get chronological order
             message_data = {
-                'message_id': str(message.id),
+                'message_id': message.id,
                 'sender_id': str(message.sender.id),
                 'sender_username': message.sender.username,
                 'encrypted_content': message.encrypted_content,
                 'content_hash': message.content_hash,
                 'message_type': message.message_type,
-                'timestamp': message.timestamp.isoformat(),
+                'timestamp': message.timestamp,
                 'is_edited': message.is_edited,
-                'edited_at': message.edited_at.isoformat() if message.edited_at else None,
-                'reply_to': str(message.reply_to.id) if message.reply_to else None
+                'edited_at': message.edited_at,
+                'reply_to': message.reply_to_id
             }
             message_list.append(message_data)
         
+        # A full page means there may be more; only then is the total worth counting
+        if len(messages) == limit:
+            total_count = Message.objects.filter(room_id=room_id, is_deleted=False).count()
+        else:
+            total_count = offset + len(messages)
+        
         # Send message history
         history_response = {
             'room_id': room_id,
             'messages': message_list,
-            'total_count': Message.objects.filter(room=room, is_deleted=False).count(),
-            'has_more': offset + limit < Message.objects.filter(room=room, is_deleted=False).count()
+            'total_count': total_count,
+            'has_more': offset + limit < total_count
         }
         
         sio.emit('room_history', history_response, room=sid)
         
-        logger.info(f"Room history sent to {user.username} for room {room_id}")
+        logger.info("Room history sent to %s for room %s", user.username, room_id)
         
     except Exception as e:
-        logger.error(f"Get room history error: {str(e)}")
+        logger.error("Get room history error: %s", e)
         sio.emit('error', {'message': 'Failed to get room history'}, room=sid)
 
 @sio.event
@@ -747,68 +1141,55 @@ def create_room(sid, data):
         room = ChatRoom.objects.create(
             name=room_name,
             room_type=room_type,
-            created_by=user,
+            created_by_id=user.id,
             description=description
         )
         
-        # Add creator as participant
-        room.participants.add(user)
-        
-        # Add other participants
+        # Resolve the other participants once; reused for memberships and payloads
+        participants = []
         if participant_ids:
             try:
-                participants = User.objects.filter(id__in=participant_ids)
-                room.participants.add(*participants)
+                participants = list(
+                    User.objects.filter(id__in=participant_ids).exclude(id=user.id).only('id', 'username')
+                )
             except Exception as e:
-                logger.error(f"Error adding participants: {str(e)}")
+                logger.error("Error adding participants: %s", e)
+        
+        # Add creator and other participants
+        room.participants.add(user.id, *participants)
         
         # Create membership records
-        from .models import RoomMembership
-        RoomMembership.objects.create(
-            user=user,
-            room=room,
-            role='owner'
+        RoomMembership.objects.bulk_create(
+            [RoomMembership(user_id=user.id, room=room, role='owner')] +
+            [RoomMembership(user=participant, room=room, role='member') for participant in participants]
         )
         
-        for participant_id in participant_ids:
-            try:
-                participant = User.objects.get(id=participant_id)
-                RoomMembership.objects.create(
-                    user=participant,
-                    room=room,
-                    role='member'
-                )
-            except User.DoesNotExist:
-                continue
-        
         # Send room created response
         room_data = {
-            'room_id': str(room.id),
+            'room_id': room.id,
             'room_name': room.name,
             'room_type': room.room_type,
             'description': room.description,
             'created_by': user.username,
-            'created_at': room.created_at.isoformat(),
+            'created_at': room.created_at,
             'participants': [
                 {
                     'user_id': str(p.id),
                     'username': p.username
-                } for p in room.participants.all()
+                } for p in [user, *participants]
             ]
         }
         
         sio.emit('room_created', room_data, room=sid)
         
-        # Notify other participants about the new room
-        for participant in room.participants.exclude(id=user.id):
-            if participant.id in user_sessions:
-                participant_sid = user_sessions[participant.id]['session_id']
-                sio.emit('room_invitation', room_data, room=participant_sid)
+        # Notify other participants about the new room, encoding the payload once
+        if participants:
+            queue_room_event([user_room(p.id) for p in participants], 'room_invitation', room_data)
         
-        logger.info(f"Room created by {user.username}: {room.name}")
+        logger.info("Room created by %s: %s", user.username, room.name)
         
     except Exception as e:
-        logger.error(f"Create room error: {str(e)}")
+        logger.error("Create room error: %s", e)
         sio.emit('error', {'message': 'Failed to create room'}, room=sid)
 
 @sio.event
@@ -827,63 +1208,55 @@ def invite_to_room(sid, data):
             sio.emit('error', {'message': 'User not authenticated'}, room=sid)
             return
             
-        # Verify room access and admin permissions
+        # Verify room access and admin permissions in one query
         try:
-            room = ChatRoom.objects.get(id=room_id)
-            membership = RoomMembership.objects.get(user=user, room=room)
+            membership = RoomMembership.objects.select_related('room').get(user_id=user.id, room_id=room_id)
+            room = membership.room
             if membership.role not in ['admin', 'owner']:
                 sio.emit('error', {'message': 'Insufficient permissions'}, room=sid)
                 return
-        except (ChatRoom.DoesNotExist, RoomMembership.DoesNotExist):
+        except (RoomMembership.DoesNotExist, ValueError, ValidationError):
             sio.emit('error', {'message': 'Room not found or access denied'}, room=sid)
             return
             
-        # Add new participants
-        invited_users = []
-        for user_id in user_ids:
-            try:
-                invite_user = User.objects.get(id=user_id)
-                
-                # Check if user is already a participant
-                if not room.participants.filter(id=user_id).exists():
-                    room.participants.add(invite_user)
-                    
-                    # Create membership
-                    RoomMembership.objects.create(
-                        user=invite_user,
-                        room=room,
-                        role='member'
-                    )
-                    
-                    invited_users.append({
-                        'user_id': str(invite_user.id),
-                        'username': invite_user.username
-                    })
-                    
-                    # Notify the invited user
-                    if invite_user.id in user_sessions:
-                        invite_sid = user_sessions[invite_user.id]['session_id']
-                        sio.emit('room_invitation', {
-                            'room_id': str(room.id),
-                            'room_name': room.name,
-                            'invited_by': user.username
-                        }, room=invite_sid)
-                        
-            except User.DoesNotExist:
-                continue
+        # Add new participants: one query for the invitees not yet in the room,
+        # then one M2M insert and one membership insert for all of them
+        new_users = list(
+            User.objects.filter(id__in=user_ids).exclude(chat_rooms=room).only('id', 'username')
+        )
+        if new_users:
+            room.participants.add(*new_users)
+            RoomMembership.objects.bulk_create(
+                [RoomMembership(user=invite_user, room=room, role='member') for invite_user in new_users],
+                ignore_conflicts=True
+            )
+        
+        invited_users = [
+            {
+                'user_id': str(invite_user.id),
+                'username': invite_user.username
+            } for invite_user in new_users
+        ]
         
-        # Notify all room members about new participants
         if invited_users:
-            sio.emit('users_invited', {
-                'room_id': str(room.id),
+            # Notify the invited users with a single emit to their personal rooms
+            queue_room_event([user_room(invited['user_id']) for invited in invited_users], 'room_invitation', {
+                'room_id': room.id,
+                'room_name': room.name,
+                'invited_by': user.username
+            })
+            
+            # Notify all room members about new participants
+            queue_room_event(room_id, 'users_invited', {
+                'room_id': room.id,
                 'invited_users': invited_users,
                 'invited_by': user.username
-            }, room=room_id)
+            })
             
-        logger.info(f"Users invited to room {room.name} by {user.username}: {len(invited_users)} users")
+        logger.info("Users invited to room %s by %s: %s users", room.name, user.username, len(invited_users))
         
     except Exception as e:
-        logger.error(f"Invite to room error: {str(e)}")
+        logger.error("Invite to room error: %s", e)
         sio.emit('error', {'message': 'Failed to invite users'}, room=sid)
 
 @sio.event
@@ -905,11 +1278,7 @@ def send_notification(sid, data):
             return
             
         # Find target user's session
-        target_session = None
-        for user_id, session_data in user_sessions.items():
-            if str(user_id) == str(target_user_id):
-                target_session = session_data['session_id']
-                break
+        target_session = user_id_to_sid.get(str(target_user_id))
         
         if target_session:
             # Send notification to target user
@@ -920,16 +1289,16 @@ def send_notification(sid, data):
                 'message': message,
                 'sender_id': str(user.id),
                 'sender_username': user.username,
-                'timestamp': timezone.now().isoformat()
+                'timestamp': timezone.now()
             }
             
-            sio.emit('notification', notification_data, room=target_session)
-            logger.info(f"Notification sent from {user.username} to user {target_user_id}: {notification_type}")
+            queue_room_event(target_session, 'notification', notification_data)
+            logger.info("Notification sent from %s to user %s: %s", user.username, target_user_id, notification_type)
         else:
-            logger.info(f"Target user {target_user_id} not online - notification will be stored in database")
+            logger.info("Target user %s not online - notification will be stored in database", target_user_id)
             
     except Exception as e:
-        logger.error(f"Send notification error: {str(e)}")
+        logger.error("Send notification error: %s", e)
         sio.emit('error', {'message': 'Failed to send notification'}, room=sid)
 
 @sio.event
@@ -941,56 +1310,63 @@ def get_user_rooms(sid, data):
             sio.emit('error', {'message': 'User not authenticated'}, room=sid)
             return
             
-        # Get all rooms where user is a participant
-        user_rooms = ChatRoom.objects.filter(participants=user, is_active=True).order_by('-updated_at')
+        # Get all rooms where user is a participant, with the user's membership
+        # and the participants prefetched in a fixed number of queries instead of
+        # several per room. The last message comes from the room's snapshot
+        # columns, the same source as the REST room list.
+        user_rooms = ChatRoom.objects.filter(
+            participants=user.id, is_active=True
+        ).select_related('last_message_sender').prefetch_related(
+            Prefetch(
+                'memberships',
+                queryset=RoomMembership.objects.filter(user_id=user.id).with_unread_count(),
+                to_attr='my_membership'
+            ),
+            Prefetch(
+                'participants',
+                queryset=User.objects.only('id', 'username', 'full_name', 'firstname', 'lastname'),
+                to_attr='cached_participants'
+            )
+        ).order_by('-updated_at')
         
         rooms_data = []
         for room in user_rooms:
             # Get unread count for this user
-            try:
-                membership = RoomMembership.objects.get(user=user, room=room)
-                unread_count = membership.unread_count
-            except RoomMembership.DoesNotExist:
-                unread_count = 0
-            
-            # Get last message
-            last_message = room.last_message
+            unread_count = room.my_membership[0].unread_count if room.my_membership else 0
             
             # Get other participants
-            other_participants = room.participants.exclude(id=user.id)
+            other_participants = [p for p in room.cached_participants if p.id != user.id]
             
             room_info = {
-                'room_id': str(room.id),
+                'room_id': room.id,
                 'room_name': room.name,
                 'room_type': room.room_type,
                 'description': room.description,
-                'created_at': room.created_at.isoformat(),
-                'updated_at': room.updated_at.isoformat(),
+                'created_at': room.created_at,
+                'updated_at': room.updated_at,
                 'unread_count': unread_count,
                 'participants': [
                     {
                         'user_id': str(p.id),
                         'username': p.username,
-                        'full_name': p.get_full_name()
+                        'full_name': p.full_name or f"{p.firstname} {p.lastname}"
                     } for p in other_participants
                 ],
                 'last_message': {
-                    'message_id': str(last_message.id),
-                    'sender_username': last_message.sender.username,
-                    'encrypted_content': last_message.encrypted_content,
-                    'message_type': last_message.message_type,
-                    'timestamp': last_message.timestamp.isoformat(),
-                    'is_edited': last_message.is_edited
-                } if last_message else None
+                    'sender_id': str(room.last_message_sender_id) if room.last_message_sender_id else None,
+                    'sender_username': room.last_message_sender.username if room.last_message_sender else None,
+                    'encrypted_content': room.last_message_preview,
+                    'timestamp': room.last_message_timestamp
+                } if room.last_message_timestamp else None
             }
             
             rooms_data.append(room_info)
         
         sio.emit('user_rooms', {'rooms': rooms_data}, room=sid)
-        logger.info(f"Sent {len(rooms_data)} rooms to user {user.username}")
+        logger.info("Sent %s rooms to user %s", len(rooms_data), user.username)
         
     except Exception as e:
-        logger.error(f"Get user rooms error: {str(e)}")
+        logger.error("Get user rooms error: %s", e)
         sio.emit('error', {'message': 'Failed to get user rooms'}, room=sid)
 
 # Create WSGI application
@@ -1002,8 +1378,6 @@ def create_app():
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
     django_app = get_wsgi_application()
     
-    # Wrap Django with Socket.IO
+    # Wrap Django with Socket.IO: /socket.io/ requests go straight to
+    # python-socketio (streaming, no Django middleware); the rest to Django
     return socketio.WSGIApp(sio, django_app, socketio_path='socket.io')
-
-# Export for use in WSGI
-application = create_app()
\ No newline at end of file
@@ -1,3 +1,278 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from .models import ChatRoom, Message, MessageAttachment, MessageStatus, RoomMembership
+
+User = get_user_model()
+
+
+def make_user(username, user_type='talent'):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password='test-pass-123',
+        firstname=username.title(),
+        lastname='Test',
+        user_type=user_type,
+    )
+
+
+def make_room(*users, room_type='group', **kwargs):
+    room = ChatRoom.objects.create(created_by=users[0], room_type=room_type, **kwargs)
+    room.participants.add(*users)
+    return room
+
+
+def make_message(room, sender, **kwargs):
+    return Message.objects.create(room=room, sender=sender, encrypted_content='ciphertext', **kwargs)
+
+
+def status_map(message):
+    return dict(MessageStatus.objects.filter(message=message).values_list('user_id', 'status'))
+
+
+class GetPrivateRoomTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = make_user('mentor', user_type='mentor')
+        cls.talent = make_user('talent')
+
+    def test_keyed_room_found_in_either_order_with_one_query(self):
+        room = make_room(
+            self.mentor, self.talent, room_type='private',
+            private_room_key=ChatRoom.private_room_key_for(self.mentor.id, self.talent.id)
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(ChatRoom.get_private_room(self.talent.id, self.mentor.id), room)
+        self.assertEqual(ChatRoom.get_private_room(self.mentor.id, self.talent.id), room)
+
+    def test_legacy_room_found_and_key_recorded(self):
+        room = make_room(self.mentor, self.talent, room_type='private')
+        self.assertIsNone(room.private_room_key)
+
+        found = ChatRoom.get_private_room(self.mentor.id, self.talent.id)
+
+        self.assertEqual(found, room)
+        expected_key = ChatRoom.private_room_key_for(self.mentor.id, self.talent.id)
+        self.assertEqual(found.private_room_key, expected_key)
+        room.refresh_from_db()
+        self.assertEqual(room.private_room_key, expected_key)
+        # Once backfilled, the lookup is the single keyed probe
+        with self.assertNumQueries(1):
+            self.assertEqual(ChatRoom.get_private_room(self.talent.id, self.mentor.id), room)
+
+    def test_group_room_with_same_participants_is_not_a_private_room(self):
+        make_room(self.mentor, self.talent, room_type='group')
+        self.assertIsNone(ChatRoom.get_private_room(self.mentor.id, self.talent.id))
+
+    def test_legacy_room_of_another_pair_is_not_matched(self):
+        other = make_user('other')
+        make_room(self.mentor, other, room_type='private')
+        self.assertIsNone(ChatRoom.get_private_room(self.mentor.id, self.talent.id))
+
+
+class BulkUpsertStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = make_user('sender')
+        cls.alice = make_user('alice')
+        cls.bob = make_user('bob')
+        cls.room = make_room(cls.sender, cls.alice, cls.bob)
+        cls.message = make_message(cls.room, cls.sender)
+
+    def test_inserts_a_row_per_user(self):
+        count = MessageStatus.bulk_upsert_status(
+            self.message.id, [self.alice.id, self.bob.id], 'delivered'
+        )
+        self.assertEqual(count, 2)
+        self.assertEqual(status_map(self.message), {self.alice.id: 'delivered', self.bob.id: 'delivered'})
+
+    def test_updates_existing_rows_without_duplicates(self):
+        MessageStatus.objects.create(message=self.message, user=self.alice, status='delivered')
+
+        with self.assertNumQueries(1):
+            MessageStatus.bulk_upsert_status(self.message.id, [self.alice.id, self.bob.id], 'read')
+
+        self.assertEqual(status_map(self.message), {self.alice.id: 'read', self.bob.id: 'read'})
+        self.assertEqual(MessageStatus.objects.filter(message=self.message).count(), 2)
+
+    def test_accepts_any_iterable_of_user_ids(self):
+        MessageStatus.bulk_upsert_status(
+            self.message.id, (user_id for user_id in [self.alice.id]), 'delivered'
+        )
+        self.assertEqual(status_map(self.message), {self.alice.id: 'delivered'})
+
+    def test_no_users_is_a_no_op(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(MessageStatus.bulk_upsert_status(self.message.id, [], 'read'), 0)
+
+
+class MarkReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = make_user('sender')
+        cls.reader = make_user('reader')
+        cls.outsider = make_user('outsider')
+        cls.room = make_room(cls.sender, cls.reader)
+        cls.other_room = make_room(cls.sender, cls.outsider)
+        cls.first = make_message(cls.room, cls.sender)
+        cls.second = make_message(cls.room, cls.sender)
+        cls.elsewhere = make_message(cls.other_room, cls.sender)
+
+    def test_marks_visible_messages_read_in_one_query(self):
+        with self.assertNumQueries(1):
+            count = MessageStatus.mark_read(self.reader, [self.first.id, self.second.id])
+        self.assertEqual(count, 2)
+        self.assertEqual(status_map(self.first), {self.reader.id: 'read'})
+        self.assertEqual(status_map(self.second), {self.reader.id: 'read'})
+
+    def test_upgrades_existing_status(self):
+        MessageStatus.objects.create(message=self.first, user=self.reader, status='delivered')
+
+        MessageStatus.mark_read(self.reader, [self.first.id])
+
+        self.assertEqual(status_map(self.first), {self.reader.id: 'read'})
+        self.assertEqual(MessageStatus.objects.filter(message=self.first).count(), 1)
+
+    def test_skips_messages_in_rooms_the_user_is_not_in(self):
+        count = MessageStatus.mark_read(self.reader, [self.first.id, self.elsewhere.id])
+        self.assertEqual(count, 1)
+        self.assertEqual(status_map(self.elsewhere), {})
+
+    def test_non_participant_marks_nothing(self):
+        self.assertEqual(MessageStatus.mark_read(self.outsider, [self.first.id, self.second.id]), 0)
+        self.assertFalse(MessageStatus.objects.filter(user=self.outsider).exists())
+
+    def test_accepts_string_ids_and_ignores_unknown_ones(self):
+        count = MessageStatus.mark_read(
+            self.reader, [str(self.first.id), '00000000-0000-0000-0000-000000000000']
+        )
+        self.assertEqual(count, 1)
+
+    def test_no_ids_is_a_no_op(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(MessageStatus.mark_read(self.reader, []), 0)
+
+
+class CleanupChatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = make_user('sender')
+        cls.room = make_room(cls.sender)
+
+    def make_deleted_message(self, days_ago, is_deleted=True):
+        message = make_message(self.room, self.sender, is_deleted=is_deleted)
+        # timestamp is auto_now_add, so backdate it with an UPDATE
+        Message.objects.filter(pk=message.pk).update(timestamp=timezone.now() - timedelta(days=days_ago))
+        return message
+
+    def run_cleanup(self, *args):
+        out = StringIO()
+        call_command('cleanup_chat', *args, stdout=out)
+        return out.getvalue()
+
+    def test_type_selects_the_retention_window(self):
+        recent = self.make_deleted_message(days_ago=10)
+        old = self.make_deleted_message(days_ago=40)
+
+        self.run_cleanup('--type', 'monthly')
+        self.assertTrue(Message.objects.filter(pk=recent.pk).exists())
+        self.assertTrue(Message.objects.filter(pk=old.pk).exists())
+
+        self.run_cleanup('--type', 'weekly')
+        self.assertTrue(Message.objects.filter(pk=recent.pk).exists())
+        self.assertFalse(Message.objects.filter(pk=old.pk).exists())
+
+        self.run_cleanup('--type', 'daily')
+        self.assertFalse(Message.objects.filter(pk=recent.pk).exists())
+
+    def test_days_overrides_type(self):
+        message = self.make_deleted_message(days_ago=10)
+        self.run_cleanup('--type', 'daily', '--days', '30')
+        self.assertTrue(Message.objects.filter(pk=message.pk).exists())
+
+    def test_only_soft_deleted_messages_are_removed(self):
+        live = self.make_deleted_message(days_ago=400, is_deleted=False)
+        self.run_cleanup('--type', 'daily')
+        self.assertTrue(Message.objects.filter(pk=live.pk).exists())
+
+    def test_dry_run_deletes_nothing(self):
+        message = self.make_deleted_message(days_ago=400)
+        output = self.run_cleanup('--type', 'daily', '--dry-run')
+        self.assertIn('Would delete 1 old messages', output)
+        self.assertTrue(Message.objects.filter(pk=message.pk).exists())
+
+    @mock.patch('chat.management.commands.cleanup_chat.CLEANUP_BATCH_PAUSE', 0)
+    @mock.patch('chat.management.commands.cleanup_chat.CLEANUP_BATCH_SIZE', 2)
+    def test_deletes_in_chunks_with_dependent_rows(self):
+        old = [self.make_deleted_message(days_ago=400) for _ in range(5)]
+        MessageStatus.objects.create(message=old[0], user=self.sender, status='read')
+        MessageAttachment.objects.create(
+            message=old[1], file_name='notes.pdf', file_size=10, file_type='application/pdf'
+        )
+        reply = make_message(self.room, self.sender, reply_to=old[2])
+        membership = RoomMembership.objects.create(user=self.sender, room=self.room, last_read_message=old[3])
+
+        output = self.run_cleanup('--type', 'daily')
+
+        # 5 messages at 2 per chunk: three chunks, each reported as it commits
+        progress = [line for line in output.splitlines() if line.endswith('old messages so far')]
+        self.assertEqual(progress, [
+            'Deleted 2 old messages so far',
+            'Deleted 4 old messages so far',
+            'Deleted 5 old messages so far',
+        ])
+        self.assertIn('Deleted 5 old messages and 1 attachments', output)
+        self.assertFalse(Message.objects.filter(pk__in=[message.pk for message in old]).exists())
+        self.assertFalse(MessageStatus.objects.filter(message__in=old).exists())
+        self.assertFalse(MessageAttachment.objects.exists())
+        # SET_NULL relations are cleared, not cascaded
+        reply.refresh_from_db()
+        self.assertIsNone(reply.reply_to_id)
+        membership.refresh_from_db()
+        self.assertIsNone(membership.last_read_message_id)
+
+
+class MessageListPaginationTests(TestCase):
+    url = '/api/v1/chat/messages/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = make_user('sender')
+        cls.room = make_room(cls.sender)
+        cls.messages = [make_message(cls.room, cls.sender) for _ in range(3)]
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def test_without_cursor_keeps_page_number_shape(self):
+        response = self.client.get(self.url, {'room_id': str(self.room.id), 'page': 1})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(len(body['results']), 3)
+
+    def test_cursor_pages_newest_first_without_count(self):
+        response = self.client.get(self.url, {'room_id': str(self.room.id), 'cursor': '', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertNotIn('count', body)
+        self.assertEqual(
+            [message['id'] for message in body['results']],
+            [str(self.messages[2].id), str(self.messages[1].id)]
+        )
 
-# Create your tests here.
+        response = self.client.get(body['next'])
+        self.assertEqual(
+            [message['id'] for message in response.json()['results']],
+            [str(self.messages[0].id)]
+        )
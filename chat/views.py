@@ -1,9 +1,15 @@
 from rest_framework import generics, status, permissions
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Prefetch
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Prefetch, Case, When, Value, BooleanField
+from django.db.models.functions import Greatest
+from django.contrib.postgres.search import TrigramSimilarity
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
@@ -22,11 +28,39 @@ from .serializers import (
     ChatRoomSerializer, ChatRoomCreateSerializer, MessageSerializer,
     MessageCreateSerializer, EncryptionKeySerializer, EncryptionKeyCreateSerializer,
     MessageReadSerializer, FileUploadSerializer, RoomInviteSerializer,
-    UserSearchSerializer, UserPresenceSerializer
+    UserSearchSerializer, UserPresenceSerializer, UserBasicSerializer
 )
+from .message_cache import serialize_messages, invalidate_cached_message
+from .room_access import invalidate_room_access
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
+
+
+def _basic_users():
+    """User queryset trimmed to what UserBasicSerializer renders"""
+    return UserBasicSerializer.setup_eager_loading(User.objects.all())
+
+
+class MessageCursorPagination(CursorPagination):
+    """
+    Keyset pagination over message timestamps: each page is a
+    WHERE timestamp < <cursor> ... LIMIT query served by the
+    (room, is_deleted, timestamp) index, with no COUNT and no OFFSET scan.
+    """
+    ordering = '-timestamp'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    
+    @classmethod
+    def requested(cls, request):
+        """
+        Cursor paging is opt-in: clients send ?cursor= (empty for the first
+        page) and follow 'next'. Requests without it keep the default
+        ?page= pagination and its {count, next, previous, results} shape.
+        """
+        return cls.cursor_query_param in request.query_params
 # channel_layer = get_channel_layer()  # Removed - using Socket.io
 
 @method_decorator(ratelimit(key='user', rate='30/m', method='POST', block=True), name='create')
@@ -41,15 +75,23 @@ class ChatRoomListView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         """Get chat rooms for the current user"""
+        includes = ChatRoomSerializer.requested_includes(self.request)
+        prefetches = [
+            Prefetch('participants', queryset=_basic_users()),
+            Prefetch('created_by', queryset=_basic_users()),
+        ]
+        if 'memberships' in includes:
+            prefetches.append(Prefetch(
+                'memberships',
+                queryset=RoomMembership.objects.with_unread_count().prefetch_related(
+                    Prefetch('user', queryset=_basic_users())
+                )
+            ))
+        
         return ChatRoom.objects.filter(
             participants=self.request.user,
             is_active=True
-        ).prefetch_related(
-            'participants',
-            'created_by',
-            Prefetch('messages', queryset=Message.objects.filter(is_deleted=False).order_by('-timestamp')[:1]),
-            'memberships__user'
-        ).distinct().order_by('-updated_at')
+        ).prefetch_related(*prefetches).distinct().order_by('-updated_at')
     
     def create(self, request, *args, **kwargs):
         """Create a new chat room"""
@@ -59,46 +101,50 @@ class ChatRoomListView(generics.ListCreateAPIView):
         participant_ids = serializer.validated_data.pop('participant_ids')
         room_type = serializer.validated_data.get('room_type', 'private')
         
-        # For private chats, check if room already exists
+        # For private chats, check if room already exists (single lookup on
+        # the unique private_room_key)
+        private_room_key = None
         if room_type == 'private':
             other_user_id = participant_ids[0]
-            existing_room = ChatRoom.objects.filter(
-                room_type='private',
-                participants=request.user
-            ).filter(
-                participants=other_user_id
-            ).first()
+            existing_room = ChatRoom.get_private_room(request.user.id, other_user_id)
             
             if existing_room:
                 return Response(
                     ChatRoomSerializer(existing_room).data,
                     status=status.HTTP_200_OK
                 )
+            private_room_key = ChatRoom.private_room_key_for(request.user.id, other_user_id)
         
         # Create new room
-        room = ChatRoom.objects.create(
-            created_by=request.user,
-            **serializer.validated_data
-        )
+        try:
+            with transaction.atomic():
+                room = ChatRoom.objects.create(
+                    created_by=request.user,
+                    private_room_key=private_room_key,
+                    **serializer.validated_data
+                )
+        except IntegrityError:
+            # A concurrent request created the same private room first
+            return Response(
+                ChatRoomSerializer(ChatRoom.get_private_room(request.user.id, other_user_id)).data,
+                status=status.HTTP_200_OK
+            )
         
         # Add participants
-        participants = User.objects.filter(id__in=participant_ids)
-        room.participants.add(request.user)  # Add creator
-        room.participants.add(*participants)
-        
-        # Create memberships
-        RoomMembership.objects.create(
-            user=request.user,
-            room=room,
-            role='owner' if room_type == 'group' else 'member'
-        )
+        participants = list(User.objects.filter(id__in=participant_ids).only('id'))
+        room.participants.add(request.user, *participants)  # Creator plus participants
         
-        for participant in participants:
-            RoomMembership.objects.create(
-                user=participant,
+        # Create memberships in a single INSERT
+        RoomMembership.objects.bulk_create(
+            [RoomMembership(
+                user=request.user,
                 room=room,
-                role='member'
-            )
+                role='owner' if room_type == 'group' else 'member'
+            )] +
+            [RoomMembership(user=participant, room=room, role='member') for participant in participants],
+            batch_size=500,
+            ignore_conflicts=True
+        )
         
         return Response(
             ChatRoomSerializer(room).data,
@@ -117,21 +163,30 @@ class ChatRoomDetailView(generics.RetrieveUpdateDestroyAPIView):
             participants=self.request.user,
             is_active=True
         )
+    
+    def perform_destroy(self, instance):
+        # Cascaded through rows send no m2m_changed, so revoke socket access here
+        participant_ids = list(instance.participants.values_list('id', flat=True))
+        room_id = instance.id
+        instance.delete()
+        for user_id in participant_ids:
+            invalidate_room_access(user_id, room_id)
 
 class ChatRoomInviteView(APIView):
     """Invite users to a chat room"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, pk):
-        room = get_object_or_404(ChatRoom, pk=pk, participants=request.user)
-        
-        # Check if user has permission to invite (admin or owner)
+        # Room and the inviter's membership in a single JOINed query
         membership = get_object_or_404(
-            RoomMembership,
+            RoomMembership.objects.select_related('room'),
             user=request.user,
-            room=room
+            room_id=pk,
+            room__participants=request.user
         )
+        room = membership.room
         
+        # Check if user has permission to invite (admin or owner)
         if membership.role not in ['admin', 'owner']:
             return Response(
                 {'error': 'Permission denied'},
@@ -146,18 +201,17 @@ class ChatRoomInviteView(APIView):
         
         # Filter out users already in the room
         existing_participants = room.participants.values_list('id', flat=True)
-        new_users = users_to_invite.exclude(id__in=existing_participants)
+        new_users = list(users_to_invite.exclude(id__in=existing_participants).only('id'))
         
         # Add new users to room
         room.participants.add(*new_users)
         
-        # Create memberships
-        for user in new_users:
-            RoomMembership.objects.create(
-                user=user,
-                room=room,
-                role='member'
-            )
+        # Create memberships in a single INSERT
+        RoomMembership.objects.bulk_create(
+            [RoomMembership(user=user, room=room, role='member') for user in new_users],
+            batch_size=500,
+            ignore_conflicts=True
+        )
         
         # Real-time notifications now handled by Socket.io
         # Socket.io will handle room invitations via 'invite_to_room' event
@@ -181,6 +235,7 @@ class ChatRoomLeaveView(APIView):
                 room=room
             )
             membership.delete()
+            # The participants m2m_changed receiver drops the cached socket access
             room.participants.remove(request.user)
             
             # If it's a group chat and user was the owner, transfer ownership
@@ -192,13 +247,13 @@ class ChatRoomLeaveView(APIView):
                 
                 if next_admin:
                     next_admin.role = 'owner'
-                    next_admin.save()
+                    next_admin.save(update_fields=['role'])
                 else:
                     # Make the first member the owner
                     first_member = RoomMembership.objects.filter(room=room).first()
                     if first_member:
                         first_member.role = 'owner'
-                        first_member.save()
+                        first_member.save(update_fields=['role'])
             
             return Response(
                 {'message': 'Left room successfully'},
@@ -217,6 +272,12 @@ class MessageListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
     
+    @property
+    def pagination_class(self):
+        if MessageCursorPagination.requested(self.request):
+            return MessageCursorPagination
+        return PageNumberPagination
+    
     def get_serializer_class(self):
         if hasattr(self, 'request') and self.request and self.request.method == 'POST':
             return MessageCreateSerializer
@@ -240,14 +301,26 @@ class MessageListView(generics.ListCreateAPIView):
         return Message.objects.filter(
             room=room,
             is_deleted=False
+        ).with_status_summary(
+            self.request.user
         ).select_related(
-            'sender',
-            'reply_to__sender'
+            'reply_to'
         ).prefetch_related(
-            'attachments',
-            'statuses__user'
+            Prefetch('sender', queryset=_basic_users()),
+            Prefetch('reply_to__sender', queryset=_basic_users()),
+            'attachments'
         ).order_by('-timestamp')
     
+    def list(self, request, *args, **kwargs):
+        """List messages, reusing cached serializations where possible"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        messages = page if page is not None else queryset
+        data = serialize_messages(messages, context=self.get_serializer_context())
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+    
     def create(self, request, *args, **kwargs):
         """Create a new message"""
         room_id = request.data.get('room_id')
@@ -272,27 +345,32 @@ class MessageListView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Create message
-        message = Message.objects.create(
-            room=room,
-            sender=request.user,
-            **serializer.validated_data
-        )
-        
-        # Handle file attachments
         attachments = request.FILES.getlist('attachments', [])
-        for attachment_file in attachments:
-            MessageAttachment.objects.create(
-                message=message,
-                file=attachment_file,
-                file_name=attachment_file.name,
-                file_size=attachment_file.size,
-                file_type=attachment_file.content_type
-            )
         
-        # Update room timestamp
-        room.updated_at = timezone.now()
-        room.save()
+        # Message, attachments and the room snapshot are written in one transaction
+        with transaction.atomic():
+            # Create message
+            message = Message.objects.create(
+                room=room,
+                sender=request.user,
+                **serializer.validated_data
+            )
+            
+            # Handle file attachments in a single INSERT
+            if attachments:
+                MessageAttachment.objects.bulk_create([
+                    MessageAttachment(
+                        message=message,
+                        file=attachment_file,
+                        file_name=attachment_file.name,
+                        file_size=attachment_file.size,
+                        file_type=attachment_file.content_type
+                    )
+                    for attachment_file in attachments
+                ])
+            
+            # Update room timestamp and last-message snapshot
+            room.record_last_message(message)
         
         # Real-time messaging now handled by Socket.io 'send_message' event
         # No need for Django Channels WebSocket calls
@@ -331,7 +409,8 @@ class MessageDetailView(generics.RetrieveUpdateDestroyAPIView):
         message.content_hash = request.data.get('content_hash', message.content_hash)
         message.is_edited = True
         message.edited_at = timezone.now()
-        message.save()
+        message.save(update_fields=['encrypted_content', 'content_hash', 'is_edited', 'edited_at'])
+        message.sync_room_preview()
         
         # Real-time message editing now handled by Socket.io 'edit_message' event
         # No need for Django Channels WebSocket calls
@@ -354,6 +433,7 @@ class MessageDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Soft delete
         message.soft_delete()
+        invalidate_cached_message(message)
         
         # Real-time message deletion now handled by Socket.io 'delete_message' event
         # No need for Django Channels WebSocket calls
@@ -372,21 +452,12 @@ class MessageMarkAsReadView(APIView):
         serializer.is_valid(raise_exception=True)
         
         message_ids = serializer.validated_data['message_ids']
-        messages = Message.objects.filter(
-            id__in=message_ids,
-            room__participants=request.user
-        )
         
-        # Update or create message statuses
-        for message in messages:
-            MessageStatus.objects.update_or_create(
-                message=message,
-                user=request.user,
-                defaults={'status': 'read'}
-            )
+        # Upsert statuses for the visible messages in a single statement
+        marked = MessageStatus.mark_read(request.user, message_ids)
         
         return Response(
-            {'message': f'{len(messages)} messages marked as read'},
+            {'message': f'{marked} messages marked as read'},
             status=status.HTTP_200_OK
         )
 
@@ -403,37 +474,51 @@ class EncryptionKeyListView(generics.ListCreateAPIView):
         """Get encryption keys for users"""
         user_ids = self.request.query_params.getlist('user_ids')
         if user_ids:
-            return EncryptionKey.objects.filter(
+            queryset = EncryptionKey.objects.filter(
                 user_id__in=user_ids,
                 is_active=True
-            ).select_related('user')
+            )
+        else:
+            # Return current user's keys
+            queryset = EncryptionKey.objects.filter(
+                user=self.request.user,
+                is_active=True
+            )
         
-        # Return current user's keys
-        return EncryptionKey.objects.filter(
-            user=self.request.user,
-            is_active=True
+        # Only the serialized columns; the owner is loaded once per user with
+        # just what UserBasicSerializer renders (profiles included)
+        return queryset.only(
+            'id', 'user_id', 'key_id', 'public_key', 'created_at', 'is_active'
+        ).prefetch_related(
+            Prefetch('user', queryset=_basic_users())
         )
     
     def create(self, request, *args, **kwargs):
         """Create a new encryption key"""
-        # Deactivate old keys
-        EncryptionKey.objects.filter(
-            user=request.user,
-            is_active=True
-        ).update(is_active=False)
-        
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        key = EncryptionKey.objects.create(
-            user=request.user,
-            **serializer.validated_data
-        )
+        try:
+            key = self._rotate_key(request.user, serializer.validated_data)
+        except IntegrityError:
+            # A concurrent rotation activated its key between our UPDATE and
+            # INSERT (the one-active-key constraint caught it); ours is newer
+            key = self._rotate_key(request.user, serializer.validated_data)
         
         return Response(
             EncryptionKeySerializer(key).data,
             status=status.HTTP_201_CREATED
         )
+    
+    def _rotate_key(self, user, data):
+        """Deactivate user's active key and insert the new one as a single unit"""
+        with transaction.atomic():
+            EncryptionKey.objects.filter(
+                user=user,
+                is_active=True
+            ).update(is_active=False)
+            
+            return EncryptionKey.objects.create(user=user, **data)
 
 class UserSearchView(generics.ListAPIView):
     """Search users by username or name"""
@@ -446,19 +531,53 @@ class UserSearchView(generics.ListAPIView):
         if not query or len(query) < 2:
             return User.objects.none()
         
+        # icontains is served by the users trigram indexes; matches are ranked
+        # by their best trigram similarity to the query
         return User.objects.filter(
             Q(username__icontains=query) |
             Q(firstname__icontains=query) |
             Q(lastname__icontains=query)
-        ).exclude(
+        ).annotate(
+            _similarity=Greatest(
+                TrigramSimilarity('username', query),
+                TrigramSimilarity('firstname', query),
+                TrigramSimilarity('lastname', query)
+            )
+        ).order_by('-_similarity', 'username').exclude(
             id=self.request.user.id
-        ).select_related('presence')[:20]
+        ).select_related(
+            'talent_profile', 'mentor_profile'
+        ).annotate(
+            _is_online=Case(
+                When(presence__status='online', then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        )[:20]
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Request body too large.'
+    default_code = 'request_too_large'
 
 @method_decorator(ratelimit(key='user', rate='20/m', method='POST', block=True), name='post')
 class FileUploadView(APIView):
     """Handle file uploads for chat"""
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    # Allowance for multipart boundaries and the other form fields
+    MULTIPART_OVERHEAD = 64 * 1024
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Reject oversized uploads from the header, before the body is read
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        max_size = settings.CHAT_SETTINGS['MAX_FILE_SIZE']
+        if content_length > max_size + self.MULTIPART_OVERHEAD:
+            raise RequestTooLarge(f"File size cannot exceed {max_size // (1024 * 1024)}MB")
     
     def post(self, request):
         serializer = FileUploadSerializer(data=request.data)
@@ -1,11 +1,92 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.html import escape, format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from django.db.models import Count, Q
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import CharField, Count, F, Func, OuterRef, Q, Value
+from django.db.models.functions import Coalesce, Concat, ExtractDay, NullIf, Now
 from django.utils import timezone
 from datetime import timedelta
-from .models import TalentPool, MentorTalentSelection, MentorTalentRejection
+from functools import lru_cache
+from .models import TalentPool, MentorTalentSelection, MentorTalentRejection, MatchingStats, Sport
+
+
+# Columns read by the list_display callables below; keeps the joined rows narrow
+MATCH_ADMIN_RELATED = ('mentor__mentor_profile', 'talent__talent_profile')
+MATCH_ADMIN_ONLY_FIELDS = (
+    'id',
+    'mentor__id', 'mentor__email',
+    'mentor__mentor_profile__is_verified',
+    'talent__id', 'talent__email',
+    'talent__talent_profile__is_verified',
+)
+# TalentPoolAdmin also shows the talent's sports and location; the other two
+# admins get their sports match from common_sports_annotation instead
+TALENT_POOL_ADMIN_ONLY_FIELDS = MATCH_ADMIN_ONLY_FIELDS + (
+    'added_at', 'talent__talent_profile__selected_sports', 'talent__talent_profile__location',
+)
+
+
+@lru_cache(maxsize=None)
+def user_change_url_template():
+    """Admin change URL for a user with a '{}' placeholder, resolved once"""
+    # The URLconf imports this module, so the reverse() can't run at import time
+    return reverse('admin:userauths_user_change', args=['__id__']).replace('__id__', '{}')
+
+
+def user_link_html(user_id, is_verified, full_name, email):
+    """Changelist link to a user, built with one escape pass per value instead of format_html"""
+    verified_icon = "✅" if is_verified else "❌"
+    return mark_safe(
+        f'<a href="{user_change_url_template().format(user_id)}">'
+        f'{verified_icon} {escape(full_name)} ({escape(email)})</a>'
+    )
+
+
+def full_name_annotation(user_field):
+    """User.get_full_name() evaluated in SQL: full_name if set, else firstname + lastname"""
+    return Coalesce(
+        NullIf(F(f'{user_field}__full_name'), Value('')),
+        Concat(F(f'{user_field}__firstname'), Value(' '), F(f'{user_field}__lastname')),
+        output_field=CharField()
+    )
+
+
+def formatted_timestamp(field):
+    """Timestamp rendered by Postgres in the same shape as strftime("%b %d, %Y %H:%M")"""
+    return Func(F(field), Value('Mon DD, YYYY HH24:MI'), function='TO_CHAR', output_field=CharField())
+
+
+def common_sports_annotation():
+    """Names of the sports shared by the row's mentor and talent, via the sports M2M"""
+    return ArraySubquery(
+        Sport.objects.filter(
+            mentor_profiles__user_id=OuterRef('mentor_id'),
+            talent_profiles__user_id=OuterRef('talent_id')
+        ).values('name')
+    )
+
+
+class TalentHasLocationFilter(admin.SimpleListFilter):
+    title = 'Talent Has Location'
+    parameter_name = 'talent_has_location'
+    def lookups(self, request, model_admin):
+        return (('yes', 'Yes'), ('no', 'No'))
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.exclude(talent__talent_profile__location='')
+        if self.value() == 'no':
+            return queryset.filter(talent__talent_profile__location='')
+        return queryset
+
+
+@admin.register(Sport)
+class SportAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
+    ordering = ['name']
 
 
 @admin.register(TalentPool)
@@ -19,7 +100,7 @@ class TalentPoolAdmin(admin.ModelAdmin):
     ]
     list_filter = [
         'added_at',
-        ('talent__talent_profile__location', admin.EmptyFieldListFilter),
+        TalentHasLocationFilter,
         'mentor__mentor_profile__is_verified',
         'talent__talent_profile__is_verified',
     ]
@@ -31,6 +112,8 @@ class TalentPoolAdmin(admin.ModelAdmin):
     readonly_fields = ['added_at']
     ordering = ['-added_at']
     list_per_page = 25
+    list_select_related = MATCH_ADMIN_RELATED
+    show_full_result_count = False
     
     # Custom actions
     actions = ['remove_from_pool', 'export_pool_data']
@@ -38,30 +121,14 @@ class TalentPoolAdmin(admin.ModelAdmin):
     def mentor_display(self, obj):
         """Display mentor with verification status and link"""
         mentor = obj.mentor
-        verified_icon = "✅" if mentor.mentor_profile.is_verified else "❌"
-        mentor_url = reverse('admin:userauths_user_change', args=[mentor.id])
-        return format_html(
-            '<a href="{}">{} {} {}</a>',
-            mentor_url,
-            verified_icon,
-            mentor.get_full_name(),
-            f"({mentor.email})"
-        )
+        return user_link_html(mentor.id, mentor.mentor_profile.is_verified, obj.mentor_full_name, mentor.email)
     mentor_display.short_description = "Mentor"
     mentor_display.admin_order_field = 'mentor__firstname'
     
     def talent_display(self, obj):
         """Display talent with verification status and link"""
         talent = obj.talent
-        verified_icon = "✅" if talent.talent_profile.is_verified else "❌"
-        talent_url = reverse('admin:userauths_user_change', args=[talent.id])
-        return format_html(
-            '<a href="{}">{} {} {}</a>',
-            talent_url,
-            verified_icon,
-            talent.get_full_name(),
-            f"({talent.email})"
-        )
+        return user_link_html(talent.id, talent.talent_profile.is_verified, obj.talent_full_name, talent.email)
     talent_display.short_description = "Talent"
     talent_display.admin_order_field = 'talent__firstname'
     
@@ -90,7 +157,7 @@ class TalentPoolAdmin(admin.ModelAdmin):
     
     def added_at_formatted(self, obj):
         """Display formatted date"""
-        return obj.added_at.strftime("%b %d, %Y %H:%M")
+        return obj.added_at_str
     added_at_formatted.short_description = "Added Date"
     added_at_formatted.admin_order_field = 'added_at'
     
@@ -111,8 +178,11 @@ class TalentPoolAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with related data"""
         return super().get_queryset(request).select_related(
-            'mentor__mentor_profile',
-            'talent__talent_profile'
+            *MATCH_ADMIN_RELATED
+        ).only(*TALENT_POOL_ADMIN_ONLY_FIELDS).annotate(
+            mentor_full_name=full_name_annotation('mentor'),
+            talent_full_name=full_name_annotation('talent'),
+            added_at_str=formatted_timestamp('added_at')
         )
 
 
@@ -127,7 +197,7 @@ class MentorTalentSelectionAdmin(admin.ModelAdmin):
     ]
     list_filter = [
         'selected_at',
-        ('talent__talent_profile__location', admin.EmptyFieldListFilter),
+        TalentHasLocationFilter,
         'mentor__mentor_profile__is_verified',
         'talent__talent_profile__is_verified',
     ]
@@ -139,6 +209,8 @@ class MentorTalentSelectionAdmin(admin.ModelAdmin):
     readonly_fields = ['selected_at']
     ordering = ['-selected_at']
     list_per_page = 25
+    list_select_related = MATCH_ADMIN_RELATED
+    show_full_result_count = False
     
     # Custom actions
     actions = ['export_selections_data']
@@ -146,43 +218,25 @@ class MentorTalentSelectionAdmin(admin.ModelAdmin):
     def mentor_display(self, obj):
         """Display mentor with verification status and link"""
         mentor = obj.mentor
-        verified_icon = "✅" if mentor.mentor_profile.is_verified else "❌"
-        mentor_url = reverse('admin:userauths_user_change', args=[mentor.id])
-        return format_html(
-            '<a href="{}">{} {} {}</a>',
-            mentor_url,
-            verified_icon,
-            mentor.get_full_name(),
-            f"({mentor.email})"
-        )
+        return user_link_html(mentor.id, mentor.mentor_profile.is_verified, obj.mentor_full_name, mentor.email)
     mentor_display.short_description = "Mentor"
     mentor_display.admin_order_field = 'mentor__firstname'
     
     def talent_display(self, obj):
         """Display talent with verification status and link"""
         talent = obj.talent
-        verified_icon = "✅" if talent.talent_profile.is_verified else "❌"
-        talent_url = reverse('admin:userauths_user_change', args=[talent.id])
-        return format_html(
-            '<a href="{}">{} {} {}</a>',
-            talent_url,
-            verified_icon,
-            talent.get_full_name(),
-            f"({talent.email})"
-        )
+        return user_link_html(talent.id, talent.talent_profile.is_verified, obj.talent_full_name, talent.email)
     talent_display.short_description = "Talent"
     talent_display.admin_order_field = 'talent__firstname'
     
     def sports_match_status(self, obj):
         """Display if mentor and talent sports match"""
-        mentor_sports = set(obj.mentor.mentor_profile.selected_sports)
-        talent_sports = set(obj.talent.talent_profile.selected_sports)
-        common_sports = mentor_sports.intersection(talent_sports)
+        common_sports = obj.common_sports
         
         if common_sports:
             return format_html(
                 '<span style="color: green;">✅ Match: {}</span>',
-                ", ".join(list(common_sports)[:2])
+                ", ".join(common_sports[:2])
             )
         else:
             return format_html('<span style="color: red;">❌ No Match</span>')
@@ -190,13 +244,13 @@ class MentorTalentSelectionAdmin(admin.ModelAdmin):
     
     def selection_date_formatted(self, obj):
         """Display formatted selection date"""
-        return obj.selected_at.strftime("%b %d, %Y %H:%M")
+        return obj.selected_at_str
     selection_date_formatted.short_description = "Selection Date"
     selection_date_formatted.admin_order_field = 'selected_at'
     
     def days_since_selection(self, obj):
         """Display days since selection"""
-        days = (timezone.now() - obj.selected_at).days
+        days = obj.age_days
         if days == 0:
             return "Today"
         elif days == 1:
@@ -214,8 +268,13 @@ class MentorTalentSelectionAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with related data"""
         return super().get_queryset(request).select_related(
-            'mentor__mentor_profile',
-            'talent__talent_profile'
+            *MATCH_ADMIN_RELATED
+        ).only('selected_at', *MATCH_ADMIN_ONLY_FIELDS).annotate(
+            mentor_full_name=full_name_annotation('mentor'),
+            talent_full_name=full_name_annotation('talent'),
+            common_sports=common_sports_annotation(),
+            age_days=ExtractDay(Now() - F('selected_at')),
+            selected_at_str=formatted_timestamp('selected_at')
         )
 
 
@@ -230,7 +289,7 @@ class MentorTalentRejectionAdmin(admin.ModelAdmin):
     ]
     list_filter = [
         'rejected_at',
-        ('talent__talent_profile__location', admin.EmptyFieldListFilter),
+        TalentHasLocationFilter,
         'mentor__mentor_profile__is_verified',
         'talent__talent_profile__is_verified',
     ]
@@ -242,6 +301,8 @@ class MentorTalentRejectionAdmin(admin.ModelAdmin):
     readonly_fields = ['rejected_at']
     ordering = ['-rejected_at']
     list_per_page = 25
+    list_select_related = MATCH_ADMIN_RELATED
+    show_full_result_count = False
     
     # Custom actions
     actions = ['export_rejections_data']
@@ -249,43 +310,25 @@ class MentorTalentRejectionAdmin(admin.ModelAdmin):
     def mentor_display(self, obj):
         """Display mentor with verification status and link"""
         mentor = obj.mentor
-        verified_icon = "✅" if mentor.mentor_profile.is_verified else "❌"
-        mentor_url = reverse('admin:userauths_user_change', args=[mentor.id])
-        return format_html(
-            '<a href="{}">{} {} {}</a>',
-            mentor_url,
-            verified_icon,
-            mentor.get_full_name(),
-            f"({mentor.email})"
-        )
+        return user_link_html(mentor.id, mentor.mentor_profile.is_verified, obj.mentor_full_name, mentor.email)
     mentor_display.short_description = "Mentor"
     mentor_display.admin_order_field = 'mentor__firstname'
     
     def talent_display(self, obj):
         """Display talent with verification status and link"""
         talent = obj.talent
-        verified_icon = "✅" if talent.talent_profile.is_verified else "❌"
-        talent_url = reverse('admin:userauths_user_change', args=[talent.id])
-        return format_html(
-            '<a href="{}">{} {} {}</a>',
-            talent_url,
-            verified_icon,
-            talent.get_full_name(),
-            f"({talent.email})"
-        )
+        return user_link_html(talent.id, talent.talent_profile.is_verified, obj.talent_full_name, talent.email)
     talent_display.short_description = "Talent"
     talent_display.admin_order_field = 'talent__firstname'
     
     def sports_match_status(self, obj):
         """Display if mentor and talent sports match"""
-        mentor_sports = set(obj.mentor.mentor_profile.selected_sports)
-        talent_sports = set(obj.talent.talent_profile.selected_sports)
-        common_sports = mentor_sports.intersection(talent_sports)
+        common_sports = obj.common_sports
         
         if common_sports:
             return format_html(
                 '<span style="color: orange;">⚠️ Match: {}</span>',
-                ", ".join(list(common_sports)[:2])
+                ", ".join(common_sports[:2])
             )
         else:
             return format_html('<span style="color: red;">❌ No Match</span>')
@@ -293,13 +336,13 @@ class MentorTalentRejectionAdmin(admin.ModelAdmin):
     
     def rejection_date_formatted(self, obj):
         """Display formatted rejection date"""
-        return obj.rejected_at.strftime("%b %d, %Y %H:%M")
+        return obj.rejected_at_str
     rejection_date_formatted.short_description = "Rejection Date"
     rejection_date_formatted.admin_order_field = 'rejected_at'
     
     def days_since_rejection(self, obj):
         """Display days since rejection"""
-        days = (timezone.now() - obj.rejected_at).days
+        days = obj.age_days
         if days == 0:
             return "Today"
         elif days == 1:
@@ -317,8 +360,13 @@ class MentorTalentRejectionAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with related data"""
         return super().get_queryset(request).select_related(
-            'mentor__mentor_profile',
-            'talent__talent_profile'
+            *MATCH_ADMIN_RELATED
+        ).only('rejected_at', *MATCH_ADMIN_ONLY_FIELDS).annotate(
+            mentor_full_name=full_name_annotation('mentor'),
+            talent_full_name=full_name_annotation('talent'),
+            common_sports=common_sports_annotation(),
+            age_days=ExtractDay(Now() - F('rejected_at')),
+            rejected_at_str=formatted_timestamp('rejected_at')
         )
 
 
@@ -327,36 +375,88 @@ admin.site.site_header = "Vauice Sports App Administration"
 admin.site.site_title = "Vauice Admin"
 admin.site.index_title = "Welcome to Vauice Sports App Administration"
 
-# Add custom admin actions for analytics
+MATCHING_ANALYTICS_CACHE_KEY = 'vauice:matching_analytics'
+MATCHING_ANALYTICS_CACHE_TIMEOUT = 60  # seconds
+
+
+def get_matching_analytics():
+    """Totals, last-7-day activity and top mentors for the analytics changelist"""
+    User = get_user_model()
+    week_ago = timezone.now() - timedelta(days=7)
+    
+    selections = MentorTalentSelection.objects.aggregate(
+        total=Count('id'),
+        recent=Count('id', filter=Q(selected_at__gte=week_ago))
+    )
+    rejections = MentorTalentRejection.objects.aggregate(
+        total=Count('id'),
+        recent=Count('id', filter=Q(rejected_at__gte=week_ago))
+    )
+    
+    # Top mentors by selections, grouped on the integer FK; names are fetched afterwards
+    top_counts = list(
+        MentorTalentSelection.objects.values('mentor_id')
+        .annotate(selection_count=Count('id'))
+        .order_by('-selection_count')[:5]
+    )
+    names = {
+        mentor['id']: mentor
+        for mentor in User.objects.filter(
+            id__in=[row['mentor_id'] for row in top_counts]
+        ).values('id', 'firstname', 'lastname')
+    }
+    top_mentors = [
+        {
+            'mentor_id': row['mentor_id'],
+            'firstname': names.get(row['mentor_id'], {}).get('firstname', ''),
+            'lastname': names.get(row['mentor_id'], {}).get('lastname', ''),
+            'selection_count': row['selection_count'],
+        }
+        for row in top_counts
+    ]
+    
+    return {
+        'total_pool_entries': TalentPool.objects.count(),
+        'total_selections': selections['total'],
+        'total_rejections': rejections['total'],
+        'recent_selections': selections['recent'],
+        'recent_rejections': rejections['recent'],
+        'top_mentors': top_mentors,
+    }
+
+
+@admin.register(MatchingStats)
 class MatchingAnalyticsAdmin(admin.ModelAdmin):
-    """Custom admin for matching analytics"""
+    """Read-only matching analytics page; the figures are cached by get_matching_analytics"""
+    list_display = ['mentor_display', 'talent_display', 'added_at']
+    list_select_related = ('mentor', 'talent')
+    show_full_result_count = False
+    ordering = ['-added_at']
+    list_per_page = 25
+    
+    def mentor_display(self, obj):
+        return obj.mentor.get_full_name()
+    mentor_display.short_description = "Mentor"
+    
+    def talent_display(self, obj):
+        return obj.talent.get_full_name()
+    talent_display.short_description = "Talent"
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
     
     def changelist_view(self, request, extra_context=None):
         """Add analytics to the changelist view"""
         extra_context = extra_context or {}
         
-        # Get analytics data
-        total_pool_entries = TalentPool.objects.count()
-        total_selections = MentorTalentSelection.objects.count()
-        total_rejections = MentorTalentRejection.objects.count()
-        
-        # Recent activity (last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        recent_selections = MentorTalentSelection.objects.filter(selected_at__gte=week_ago).count()
-        recent_rejections = MentorTalentRejection.objects.filter(rejected_at__gte=week_ago).count()
-        
-        # Top mentors by selections
-        top_mentors = MentorTalentSelection.objects.values('mentor__firstname', 'mentor__lastname')\
-            .annotate(selection_count=Count('id'))\
-            .order_by('-selection_count')[:5]
-        
-        extra_context.update({
-            'total_pool_entries': total_pool_entries,
-            'total_selections': total_selections,
-            'total_rejections': total_rejections,
-            'recent_selections': recent_selections,
-            'recent_rejections': recent_rejections,
-            'top_mentors': top_mentors,
-        })
+        extra_context.update(
+            cache.get_or_set(MATCHING_ANALYTICS_CACHE_KEY, get_matching_analytics, MATCHING_ANALYTICS_CACHE_TIMEOUT)
+        )
         
         return super().changelist_view(request, extra_context)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from mentor.models import MentorProfile
+from talent.models import TalentProfile, refresh_location_display
+
+
+class Command(BaseCommand):
+    help = 'Fill location_display on talent and mentor profiles saved before the column existed'
+
+    def handle(self, *args, **options):
+        for model in (TalentProfile, MentorProfile):
+            changed, checked = refresh_location_display(model.objects.all())
+            self.stdout.write(
+                self.style.SUCCESS(f"Updated {changed} of {checked} {model._meta.verbose_name_plural}")
+            )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from mentor.models import MentorProfile
+
+
+class Command(BaseCommand):
+    help = 'Bring MentorProfile.has_social_links in line with social_links for rows saved before the flag existed'
+
+    def handle(self, *args, **options):
+        # Two set-based UPDATEs that only touch rows whose flag is wrong
+        flagged = MentorProfile.objects.filter(has_social_links=False).exclude(social_links={}).update(has_social_links=True)
+        cleared = MentorProfile.objects.filter(has_social_links=True, social_links={}).update(has_social_links=False)
+        self.stdout.write(self.style.SUCCESS(f"Flagged {flagged} and cleared {cleared} mentor profiles"))
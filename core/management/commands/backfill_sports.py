@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import Sport, normalize_sport_names
+from mentor.models import MentorProfile
+from talent.models import TalentProfile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the sports M2M of talent and mentor profiles from their selected_sports JSON'
+
+    def handle(self, *args, **options):
+        profile_sports = {}
+        for model in (TalentProfile, MentorProfile):
+            profile_sports[model] = {
+                profile_id: normalize_sport_names(selected_sports)
+                for profile_id, selected_sports in model.objects.values_list('id', 'selected_sports').iterator()
+            }
+        
+        all_names = {name for rows in profile_sports.values() for names in rows.values() for name in names}
+        Sport.objects.bulk_create([Sport(name=name) for name in all_names], ignore_conflicts=True)
+        sport_ids = dict(Sport.objects.filter(name__in=all_names).values_list('name', 'id'))
+        
+        for model, rows in profile_sports.items():
+            through = model.sports.through
+            profile_column = f"{model._meta.model_name}_id"
+            links = [
+                through(**{profile_column: profile_id, 'sport_id': sport_ids[name]})
+                for profile_id, names in rows.items()
+                for name in names
+            ]
+            with transaction.atomic():
+                through.objects.all().delete()
+                through.objects.bulk_create(links, batch_size=1000)
+            
+            self.stdout.write(
+                self.style.SUCCESS(f"Linked {len(links)} sports across {len(rows)} {model._meta.verbose_name_plural}")
+            )
+        
+        self.stdout.write(self.style.SUCCESS(f"{len(all_names)} distinct sports"))
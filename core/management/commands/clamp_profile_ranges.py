@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from mentor.models import MentorProfile
+from talent.models import TalentProfile
+
+# (model, field, lowest allowed, highest allowed); mirrors the profiles' CheckConstraints
+PROFILE_RANGES = (
+    (MentorProfile, 'coaching_experience_years', 0, 50),
+    (MentorProfile, 'playing_experience_years', 0, 50),
+    (MentorProfile, 'max_students', 1, 100),
+    (TalentProfile, 'experience_years', 0, 50),
+)
+
+
+def constraints_installed(model):
+    """Whether every CheckConstraint declared on model already exists in the database"""
+    with connection.cursor() as cursor:
+        existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    return all(constraint.name in existing for constraint in model._meta.constraints)
+
+
+class Command(BaseCommand):
+    help = (
+        'One-off: clamp profile values that would violate the range CheckConstraints so migrate '
+        'can add them. A no-op once the constraints exist.'
+    )
+
+    def handle(self, *args, **options):
+        # Runs before migrate: only the range columns are read or written,
+        # so it works against the previous schema too
+        for model in {model for model, *_ in PROFILE_RANGES}:
+            if model._meta.db_table not in connection.introspection.table_names():
+                self.stdout.write(f"{model._meta.db_table} does not exist yet, nothing to clamp")
+                continue
+            if constraints_installed(model):
+                self.stdout.write(f"{model._meta.db_table}: range constraints already installed, nothing to clamp")
+                continue
+            with transaction.atomic():
+                for range_model, field, low, high in PROFILE_RANGES:
+                    if range_model is not model:
+                        continue
+                    for lookup, bound in ((f"{field}__lt", low), (f"{field}__gt", high)):
+                        rows = model.objects.filter(**{lookup: bound})
+                        changes = list(rows.values_list('id', field))
+                        if not changes:
+                            continue
+                        rows.update(**{field: bound})
+                        # Record exactly what was rewritten so it can be reviewed or reverted
+                        for profile_id, old_value in changes:
+                            self.stdout.write(self.style.WARNING(
+                                f"{model._meta.db_table} id={profile_id}: {field} {old_value} -> {bound}"
+                            ))
+        self.stdout.write(self.style.SUCCESS("Profile ranges checked"))
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from core.tasks import sync_talent_pool
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every talent\'s mentor pool rows from committed state, repairing lost background jobs'
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        talent_ids = list(User.objects.filter(user_type='talent').values_list('id', flat=True))
+        # Runs in this process, so it does not depend on any server's worker queue
+        for talent_id in talent_ids:
+            sync_talent_pool(talent_id)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled talent pools for {len(talent_ids)} talents"))
@@ -1,10 +1,50 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 
+def normalize_sport_names(selected_sports):
+    """Distinct sport names from a selected_sports value (list, dict or comma-separated string)"""
+    if not selected_sports:
+        return []
+    if isinstance(selected_sports, str):
+        selected_sports = selected_sports.split(',')
+    elif isinstance(selected_sports, dict):
+        selected_sports = list(selected_sports.values())
+    elif not isinstance(selected_sports, list):
+        selected_sports = [selected_sports]
+    names = (str(sport).strip() for sport in selected_sports)
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class Sport(models.Model):
+    """A sport that talents and mentors can select; backs the profiles' sports M2M"""
+    
+    name = models.CharField(max_length=100, unique=True)
+    
+    class Meta:
+        verbose_name = _('Sport')
+        verbose_name_plural = _('Sports')
+        db_table = 'sports'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+def sync_profile_sports(profile):
+    """Mirror a talent/mentor profile's selected_sports JSON into its sports M2M"""
+    names = normalize_sport_names(profile.selected_sports)
+    # Most full saves leave the sports alone; one read of the linked names
+    # spares the INSERT, SELECT and set() diff
+    if set(profile.sports.values_list('name', flat=True)) == set(names):
+        return
+    Sport.objects.bulk_create([Sport(name=name) for name in names], ignore_conflicts=True)
+    profile.sports.set(Sport.objects.filter(name__in=names).values_list('id', flat=True))
+
+
 class TalentPool(models.Model):
     """Pool of available talents for each mentor"""
     
@@ -28,6 +68,10 @@ class TalentPool(models.Model):
         db_table = 'talent_pools'
         unique_together = ['mentor', 'talent']
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['talent', 'mentor']),
+            models.Index(fields=['mentor', '-added_at']),
+        ]
     
     def __str__(self):
         return f"{self.mentor.get_full_name()} - {self.talent.get_full_name()}"
@@ -57,6 +101,12 @@ class MentorTalentSelection(models.Model):
         db_table = 'mentor_talent_selections'
         unique_together = ['mentor', 'talent']
         ordering = ['-selected_at']
+        # (talent, -selected_at) serves the talent-side listings in Meta.ordering order
+        # as well as lookups by talent alone
+        indexes = [
+            models.Index(fields=['talent', '-selected_at']),
+            models.Index(fields=['mentor', '-selected_at']),
+        ]
     
     def __str__(self):
         return f"{self.mentor.get_full_name()} selected {self.talent.get_full_name()}"
@@ -85,13 +135,28 @@ class MentorTalentRejection(models.Model):
         db_table = 'mentor_talent_rejections'
         unique_together = ['mentor', 'talent']
         ordering = ['-rejected_at']
+        # (talent, -rejected_at) serves the talent-side listings in Meta.ordering order
+        # as well as lookups by talent alone
+        indexes = [
+            models.Index(fields=['talent', '-rejected_at']),
+            models.Index(fields=['mentor', '-rejected_at']),
+        ]
     
     def __str__(self):
         return f"{self.mentor.get_full_name()} rejected {self.talent.get_full_name()}"
 
 
+class MatchingStats(TalentPool):
+    """Proxy over TalentPool that gives the matching analytics page an admin entry"""
+    
+    class Meta:
+        proxy = True
+        verbose_name = _('Matching Statistics')
+        verbose_name_plural = _('Matching Statistics')
+
+
 # Signal handlers to manage talent pool automatically
-@receiver(post_save, sender='userauths.User')
+@receiver(post_save, sender='userauths.User', dispatch_uid='core.talent_pool_onboarding')
 def update_talent_pool_on_user_onboarding_change(sender, instance, created, update_fields, **kwargs):
     """
     Automatically add/remove talent from mentor pools when onboarding_done status changes
@@ -109,72 +174,58 @@ def update_talent_pool_on_user_onboarding_change(sender, instance, created, upda
     if not hasattr(instance, 'talent_profile'):
         return
         
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    mentors = User.objects.filter(user_type='mentor')
-    
-    if instance.onboarding_done:
-        # Add talent to mentor pools, but exclude mentors who have already selected or rejected this talent
-        for mentor in mentors:
-            # Check if this mentor has already selected or rejected this talent
-            already_selected = MentorTalentSelection.objects.filter(mentor=mentor, talent=instance).exists()
-            already_rejected = MentorTalentRejection.objects.filter(mentor=mentor, talent=instance).exists()
-            
-            # Only add to pool if not already selected or rejected
-            if not already_selected and not already_rejected:
-                TalentPool.objects.get_or_create(
-                    mentor=mentor,
-                    talent=instance
-                )
-    else:
-        # Remove talent from all mentor pools if onboarding is not done
-        TalentPool.objects.filter(talent=instance).delete()
-
-
-@receiver(post_save, sender='mentor.MentorProfile')
+    # Pool fan-out touches one row per mentor; run it off the request thread,
+    # and only once the save has committed so the worker sees the new state
+    from .tasks import enqueue, sync_talent_pool
+    talent_id = instance.id
+    transaction.on_commit(lambda: enqueue(sync_talent_pool, talent_id))
+
+
+@receiver(post_save, sender='mentor.MentorProfile', dispatch_uid='core.talent_pool_new_mentor')
 def update_talent_pool_on_mentor_save(sender, instance, created, **kwargs):
     """
     When a new mentor is created, add all talents to their pool (profile completion logic removed)
     """
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    
     if created:
-        # Get all talents
-        talents = User.objects.filter(user_type='talent')
-        
-        # Add all talents to the new mentor's pool
-        for talent in talents:
-            TalentPool.objects.get_or_create(
-                mentor=instance.user,
-                talent=talent
-            )
+        # Add all talents to the new mentor's pool without holding up signup
+        from .tasks import enqueue, populate_mentor_pool
+        mentor_user_id = instance.user_id
+        transaction.on_commit(lambda: enqueue(populate_mentor_pool, mentor_user_id))
+
+
+@receiver(post_save, sender='talent.TalentProfile', dispatch_uid='core.sync_talent_sports')
+@receiver(post_save, sender='mentor.MentorProfile', dispatch_uid='core.sync_mentor_sports')
+def sync_sports_on_profile_save(sender, instance, update_fields, **kwargs):
+    """Keep the normalized sports M2M in step with selected_sports"""
+    if update_fields and 'selected_sports' not in update_fields:
+        return
+    sync_profile_sports(instance)
 
 
 # Signal handlers to manage talent pool when mentors make decisions
-@receiver(post_save, sender='core.MentorTalentSelection')
+@receiver(post_save, sender='core.MentorTalentSelection', dispatch_uid='core.talent_pool_selection')
 def remove_talent_from_pool_on_selection(sender, instance, created, **kwargs):
     """
     When a mentor selects a talent, remove that talent from that mentor's pool
     (But keep them in other mentors' pools)
     """
     if created:
-        # Remove talent from this specific mentor's pool only
-        TalentPool.objects.filter(
-            mentor=instance.mentor,
-            talent=instance.talent
-        ).delete()
+        # Remove talent from this specific mentor's pool only, after the decision commits
+        mentor_id, talent_id = instance.mentor_id, instance.talent_id
+        transaction.on_commit(
+            lambda: TalentPool.objects.filter(mentor_id=mentor_id, talent_id=talent_id).delete()
+        )
 
 
-@receiver(post_save, sender='core.MentorTalentRejection')
+@receiver(post_save, sender='core.MentorTalentRejection', dispatch_uid='core.talent_pool_rejection')
 def remove_talent_from_pool_on_rejection(sender, instance, created, **kwargs):
     """
     When a mentor rejects a talent, remove that talent from that mentor's pool
     (But keep them in other mentors' pools)
     """
     if created:
-        # Remove talent from this specific mentor's pool only
-        TalentPool.objects.filter(
-            mentor=instance.mentor,
-            talent=instance.talent
-        ).delete()
+        # Remove talent from this specific mentor's pool only, after the decision commits
+        mentor_id, talent_id = instance.mentor_id, instance.talent_id
+        transaction.on_commit(
+            lambda: TalentPool.objects.filter(mentor_id=mentor_id, talent_id=talent_id).delete()
+        )
@@ -1,5 +1,7 @@
+from collections import defaultdict
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from .models import TalentPool, MentorTalentSelection, MentorTalentRejection
 from talent.models import TalentProfile, Post
 from talent.serializers import TalentProfileSerializer, PostSerializer
@@ -8,10 +10,53 @@ from mentor.serializers import MentorProfileSerializer
 User = get_user_model()
 
 
-class MentorTalentSelectionSerializer(serializers.ModelSerializer):
+class TalentPostsMixin:
+    """Shared posts field for the selection/rejection serializers"""
+    
+    @classmethod
+    def prefetch_queryset(cls, queryset):
+        """Eager-load everything the nested fields read, so a page costs a fixed number of queries"""
+        return queryset.select_related(
+            'mentor__mentor_profile', 'talent__talent_profile'
+        ).prefetch_related('talent__talent_profile__posts')
+    
+    def get_posts(self, obj):
+        """Get talent's posts"""
+        try:
+            posts = obj.talent.talent_profile.posts.all()
+        except TalentProfile.DoesNotExist:
+            return []
+        # One ListSerializer per parent serializer: with many=True this child
+        # serves every row, so DRF binds the post fields once per response
+        if getattr(self, '_posts_serializer', None) is None:
+            self._posts_serializer = PostSerializer(many=True)
+        return self._posts_serializer.to_representation(posts)
+
+
+class DecisionCreateMixin:
+    """Race-safe create() for the (mentor, talent) decision serializers"""
+    
+    def create(self, validated_data):
+        """Insert the decision unless it already exists, then return the stored row"""
+        model = self.Meta.model
+        decision = model(**validated_data)
+        # Try the INSERT first and let unique_together(mentor, talent) catch duplicates;
+        # the savepoint keeps a concurrent duplicate from breaking an outer transaction.
+        # save() sends post_save as usual, so the pool and chat room receivers fire once.
+        try:
+            with transaction.atomic():
+                decision.save()
+            self.created = True
+            return decision
+        except IntegrityError:
+            self.created = False
+            return model.objects.get(mentor=validated_data['mentor'], talent=validated_data['talent'])
+
+
+class MentorTalentSelectionSerializer(TalentPostsMixin, serializers.ModelSerializer):
     """Serializer for mentor talent selections with nested data"""
-    talent_profile = serializers.SerializerMethodField()
-    mentor_profile = serializers.SerializerMethodField()
+    talent_profile = TalentProfileSerializer(source='talent.talent_profile', read_only=True)
+    mentor_profile = MentorProfileSerializer(source='mentor.mentor_profile', read_only=True)
     posts = serializers.SerializerMethodField()
     chat_room_id = serializers.SerializerMethodField()
     can_chat = serializers.SerializerMethodField()
@@ -25,51 +70,52 @@ class MentorTalentSelectionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'selected_at']
     
-    def get_talent_profile(self, obj):
-        """Get talent profile data"""
-        try:
-            return TalentProfileSerializer(obj.talent.talent_profile).data
-        except TalentProfile.DoesNotExist:
-            return None
-    
-    def get_mentor_profile(self, obj):
-        """Get mentor profile data"""
-        try:
-            return MentorProfileSerializer(obj.mentor.mentor_profile).data
-        except:
-            return None
-    
-    def get_posts(self, obj):
-        """Get talent's posts"""
-        try:
-            posts = Post.objects.filter(talent=obj.talent.talent_profile)
-            return PostSerializer(posts, many=True).data
-        except:
-            return []
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._chat_map = None
+    
+    def get_chat_room_map(self):
+        """
+        {frozenset({mentor_id, talent_id}): room_id} for every selection being
+        serialized, built with one query the first time a row asks for it.
+        With many=True the child serializer is handed the whole list, so the
+        map covers the page.
+        """
+        if self._chat_map is None:
+            from chat.models import ChatRoom
+            if isinstance(self.instance, MentorTalentSelection):
+                selections = [self.instance]
+            else:
+                selections = self.instance or []
+            user_ids = set()
+            for selection in selections:
+                user_ids.update((selection.mentor_id, selection.talent_id))
+            
+            # Ordered oldest first so the most recently active room wins, as .first() did
+            participant_rows = ChatRoom.participants.through.objects.filter(
+                chatroom__room_type='private',
+                user_id__in=user_ids
+            ).order_by('chatroom__updated_at').values_list('chatroom_id', 'user_id')
+            members = defaultdict(set)
+            for room_id, user_id in participant_rows:
+                members[room_id].add(user_id)
+            self._chat_map = {frozenset(user_set): room_id for room_id, user_set in members.items()}
+        return self._chat_map
     
     def get_chat_room_id(self, obj):
         """Get chat room ID if exists"""
-        try:
-            from chat.models import ChatRoom
-            chat_room = ChatRoom.objects.filter(
-                room_type='private',
-                participants=obj.mentor
-            ).filter(
-                participants=obj.talent
-            ).first()
-            return str(chat_room.id) if chat_room else None
-        except:
-            return None
+        room_id = self.get_chat_room_map().get(frozenset((obj.mentor_id, obj.talent_id)))
+        return str(room_id) if room_id else None
     
     def get_can_chat(self, obj):
         """Check if chat is available"""
-        return self.get_chat_room_id(obj) is not None
+        return frozenset((obj.mentor_id, obj.talent_id)) in self.get_chat_room_map()
 
 
-class MentorTalentRejectionSerializer(serializers.ModelSerializer):
+class MentorTalentRejectionSerializer(TalentPostsMixin, serializers.ModelSerializer):
     """Serializer for mentor talent rejections with nested data"""
-    talent_profile = serializers.SerializerMethodField()
-    mentor_profile = serializers.SerializerMethodField()
+    talent_profile = TalentProfileSerializer(source='talent.talent_profile', read_only=True)
+    mentor_profile = MentorProfileSerializer(source='mentor.mentor_profile', read_only=True)
     posts = serializers.SerializerMethodField()
     
     class Meta:
@@ -80,81 +126,34 @@ class MentorTalentRejectionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'rejected_at']
     
-    def get_talent_profile(self, obj):
-        """Get talent profile data"""
-        try:
-            return TalentProfileSerializer(obj.talent.talent_profile).data
-        except TalentProfile.DoesNotExist:
-            return None
-    
-    def get_mentor_profile(self, obj):
-        """Get mentor profile data"""
-        try:
-            return MentorProfileSerializer(obj.mentor.mentor_profile).data
-        except:
-            return None
-    
-    def get_posts(self, obj):
-        """Get talent's posts"""
-        try:
-            posts = Post.objects.filter(talent=obj.talent.talent_profile)
-            return PostSerializer(posts, many=True).data
-        except:
-            return []
 
 
-class MentorTalentSelectionCreateSerializer(serializers.ModelSerializer):
+class MentorTalentSelectionCreateSerializer(DecisionCreateMixin, serializers.ModelSerializer):
     """Serializer for creating mentor talent selections"""
     
     class Meta:
         model = MentorTalentSelection
         fields = ['mentor', 'talent']
-    
-    def create(self, validated_data):
-        """Create or get existing selection"""
-        selection, created = MentorTalentSelection.objects.get_or_create(
-            mentor=validated_data['mentor'],
-            talent=validated_data['talent']
-        )
-        return selection
+        # Duplicates are absorbed by the INSERT itself; skip the unique-together pre-check SELECT
+        validators = []
 
 
-class MentorTalentRejectionCreateSerializer(serializers.ModelSerializer):
+class MentorTalentRejectionCreateSerializer(DecisionCreateMixin, serializers.ModelSerializer):
     """Serializer for creating mentor talent rejections"""
     
     class Meta:
         model = MentorTalentRejection
         fields = ['mentor', 'talent']
-    
-    def create(self, validated_data):
-        """Create or get existing rejection"""
-        rejection, created = MentorTalentRejection.objects.get_or_create(
-            mentor=validated_data['mentor'],
-            talent=validated_data['talent']
-        )
-        return rejection
+        # Duplicates are absorbed by the INSERT itself; skip the unique-together pre-check SELECT
+        validators = []
 
 
 class TalentPoolSerializer(serializers.ModelSerializer):
     """Serializer for talent pool entries"""
-    mentor_profile = serializers.SerializerMethodField()
-    talent_profile = serializers.SerializerMethodField()
+    mentor_profile = MentorProfileSerializer(source='mentor.mentor_profile', read_only=True)
+    talent_profile = TalentProfileSerializer(source='talent.talent_profile', read_only=True)
     
     class Meta:
         model = TalentPool
         fields = ['id', 'mentor', 'talent', 'added_at', 'mentor_profile', 'talent_profile']
         read_only_fields = ['id', 'added_at']
-    
-    def get_mentor_profile(self, obj):
-        """Get mentor profile data"""
-        try:
-            return MentorProfileSerializer(obj.mentor.mentor_profile).data
-        except:
-            return None
-    
-    def get_talent_profile(self, obj):
-        """Get talent profile data"""
-        try:
-            return TalentProfileSerializer(obj.talent.talent_profile).data
-        except:
-            return None
\ No newline at end of file
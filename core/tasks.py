@@ -0,0 +1,87 @@
+"""
+Background jobs for talent pool maintenance.
+
+The deployment has no task queue, so pool fan-out runs on a small in-process
+worker pool: the request that triggered it returns without waiting for the
+O(mentors) / O(talents) inserts. A single worker runs jobs in the order they
+were enqueued, so two syncs for the same talent can't finish out of order
+within a process.
+
+Queued jobs live in memory: a restart drops them, and each server process has
+its own worker. Every job therefore re-derives the pool from committed state,
+and the sync_talent_pools management command (run by build.sh and cron)
+replays sync_talent_pool for every talent to repair anything lost.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.db.models import Exists, OuterRef, Q
+
+from .models import TalentPool, MentorTalentSelection, MentorTalentRejection
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='talent-pool')
+
+
+def enqueue(func, *args):
+    """Run func(*args) on the worker pool, recycling stale connections afterwards"""
+    def task():
+        try:
+            func(*args)
+        except Exception as e:
+            logger.error("Talent pool task %s failed: %s", func.__name__, e)
+        finally:
+            close_old_connections()
+    return _executor.submit(task)
+
+
+def populate_mentor_pool(mentor_user_id):
+    """Add every onboarded talent to a new mentor's pool"""
+    User = get_user_model()
+    # Same membership rule as sync_talent_pool, so the reconciliation pass
+    # never has to undo what this job added
+    talent_ids = User.objects.filter(user_type='talent', onboarding_done=True).values_list('id', flat=True)
+    TalentPool.objects.bulk_create(
+        [TalentPool(mentor_id=mentor_user_id, talent_id=talent_id) for talent_id in talent_ids],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+
+
+def sync_talent_pool(talent_id):
+    """Add a talent to, or remove them from, every mentor pool"""
+    User = get_user_model()
+    # Act on the committed state rather than the value at enqueue time
+    onboarding_done = User.objects.filter(id=talent_id).values_list('onboarding_done', flat=True).first()
+    if onboarding_done:
+        # Skip mentors who have already selected or rejected this talent, or
+        # already have them pooled; unique_together(mentor, talent) turns any
+        # row added concurrently into ON CONFLICT DO NOTHING
+        mentor_ids = User.objects.filter(user_type='mentor').exclude(
+            talent_selections__talent_id=talent_id
+        ).exclude(
+            talent_rejections__talent_id=talent_id
+        ).exclude(
+            talent_pool__talent_id=talent_id
+        ).values_list('id', flat=True)
+        TalentPool.objects.bulk_create(
+            [TalentPool(mentor_id=mentor_id, talent_id=talent_id) for mentor_id in mentor_ids],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        # A decision committed between the mentor query and the insert has
+        # already run its own pool delete, so drop any row we just re-added
+        decided = TalentPool.objects.filter(talent_id=talent_id).filter(
+            Q(Exists(MentorTalentSelection.objects.filter(mentor_id=OuterRef('mentor_id'), talent_id=talent_id))) |
+            Q(Exists(MentorTalentRejection.objects.filter(mentor_id=OuterRef('mentor_id'), talent_id=talent_id)))
+        )
+        decided._raw_delete(decided.db)
+    else:
+        # TalentPool has no dependents or delete signals, so skip the collector
+        # and issue a single DELETE instead of loading every pool row first.
+        pool_entries = TalentPool.objects.filter(talent_id=talent_id)
+        pool_entries._raw_delete(pool_entries.db)
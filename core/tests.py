@@ -1,3 +1,77 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .models import MentorTalentRejection, MentorTalentSelection
+from .serializers import MentorTalentRejectionCreateSerializer, MentorTalentSelectionCreateSerializer
+
+User = get_user_model()
+
+
+def make_user(username, user_type):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password='test-pass-123',
+        firstname=username.title(),
+        lastname='Test',
+        user_type=user_type,
+    )
+
+
+class DecisionCreateMixinTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = make_user('mentor', 'mentor')
+        cls.talent = make_user('talent', 'talent')
+
+    def save_decision(self, serializer_class):
+        serializer = serializer_class(data={'mentor': self.mentor.pk, 'talent': self.talent.pk})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer, serializer.save()
+
+    def assert_duplicate_returns_existing_row(self, serializer_class, model):
+        first_serializer, first = self.save_decision(serializer_class)
+        self.assertTrue(first_serializer.created)
+
+        # The duplicate passes validation (no unique-together pre-check) and
+        # is absorbed by the INSERT instead of raising
+        second_serializer, second = self.save_decision(serializer_class)
+        self.assertFalse(second_serializer.created)
+        self.assertEqual(second.pk, first.pk)
+
+        # The failed INSERT was confined to its savepoint, so this transaction still works
+        self.assertEqual(model.objects.filter(mentor=self.mentor, talent=self.talent).count(), 1)
+
+    def test_duplicate_selection_returns_existing_row(self):
+        self.assert_duplicate_returns_existing_row(MentorTalentSelectionCreateSerializer, MentorTalentSelection)
+
+    def test_duplicate_rejection_returns_existing_row(self):
+        self.assert_duplicate_returns_existing_row(MentorTalentRejectionCreateSerializer, MentorTalentRejection)
+
+    def test_selection_creates_the_private_chat_room_once(self):
+        from chat.models import ChatRoom
+
+        self.save_decision(MentorTalentSelectionCreateSerializer)
+        self.save_decision(MentorTalentSelectionCreateSerializer)
+
+        key = ChatRoom.private_room_key_for(self.mentor.id, self.talent.id)
+        self.assertEqual(ChatRoom.objects.filter(private_room_key=key).count(), 1)
+
+
+class SportsListETagTests(TestCase):
+    url = '/api/v1/core/fetch-sports-list/'
+
+    def test_matching_validators_get_not_modified(self):
+        from .views import SPORTS_ETAG
+
+        for if_none_match in (SPORTS_ETAG, f'W/{SPORTS_ETAG}', f'"stale", {SPORTS_ETAG}', '*'):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=if_none_match)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], SPORTS_ETAG)
+                self.assertIn('max-age=86400', response['Cache-Control'])
+
+    def test_stale_validator_gets_the_list(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sports', response.json())
@@ -1,10 +1,14 @@
+import hashlib
+import json
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from core.models import MentorTalentSelection
+from core.serializers import MentorTalentSelectionSerializer
 from mentor.models import MentorProfile
 from mentor.serializers import MentorProfileSerializer
 
@@ -42,22 +46,33 @@ SPORTS_LIST = {
     "table_football": "Table Football (Foosball)"
 }
 
+# The sports list is static for the life of the process: build the payload and
+# its validator once and let clients/CDNs cache it
+SPORTS_PAYLOAD = {"sports": SPORTS_LIST}
+SPORTS_ETAG = '"%s"' % hashlib.md5(json.dumps(SPORTS_LIST, sort_keys=True).encode()).hexdigest()
+SPORTS_CACHE_HEADERS = {'ETag': SPORTS_ETAG, 'Cache-Control': 'public, max-age=86400'}
+
 class SportsListAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        return Response({"sports": SPORTS_LIST})
+        # Let Django parse If-None-Match so lists, weak validators and "*" match too
+        not_modified = get_conditional_response(request, etag=SPORTS_ETAG)
+        if not_modified is not None:
+            for header, value in SPORTS_CACHE_HEADERS.items():
+                not_modified[header] = value
+            return not_modified
+        return Response(SPORTS_PAYLOAD, headers=SPORTS_CACHE_HEADERS)
 
 class OnboardingStatusAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, user_id):
         User = get_user_model()
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+        onboarding_done = User.objects.filter(id=user_id).values_list('onboarding_done', flat=True).first()
+        if onboarding_done is None:
             return Response({"detail": "User not found."}, status=status.HTTP_404_NOT_FOUND)
-        return Response({"onboarding_done": user.onboarding_done})
+        return Response({"onboarding_done": onboarding_done})
 
 class MentorsWhoSelectedTalentAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -70,14 +85,18 @@ class MentorsWhoSelectedTalentAPIView(APIView):
         if talent_user.user_type != 'talent':
             return Response({'error': 'Only talents can access this endpoint.'}, status=status.HTTP_403_FORBIDDEN)
         
-        selections = MentorTalentSelection.objects.filter(talent=talent_user).select_related('mentor__mentor_profile')
-        result = []
-        for selection in selections:
-            mentor_profile = getattr(selection.mentor, 'mentor_profile', None)
-            if mentor_profile:
-                mentor_data = MentorProfileSerializer(mentor_profile).data
-                result.append({
-                    'mentor': mentor_data,
-                    'selected_at': selection.selected_at
-                })
+        selections = MentorTalentSelectionSerializer.prefetch_queryset(
+            MentorTalentSelection.objects.filter(talent=talent_user)
+        )
+        selected = [
+            (mentor_profile, selection.selected_at)
+            for selection in selections
+            if (mentor_profile := getattr(selection.mentor, 'mentor_profile', None))
+        ]
+        # One ListSerializer for every profile instead of a serializer per row
+        mentor_data = MentorProfileSerializer([profile for profile, _ in selected], many=True).data
+        result = [
+            {'mentor': data, 'selected_at': selected_at}
+            for data, (_, selected_at) in zip(mentor_data, selected)
+        ]
         return Response(result)
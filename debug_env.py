@@ -3,6 +3,10 @@
 Debug script to check environment variables on Render
 """
 import os
+import re
+from itertools import islice
+
+SENSITIVE_KEY_PATTERN = re.compile(r'secret|key|token|password', re.IGNORECASE)
 
 print("=== Environment Variables Debug ===")
 print(f"SECRET_KEY: {'SET' if os.getenv('SECRET_KEY') else 'NOT SET'}")
@@ -19,11 +23,9 @@ else:
     print(".env file not found (this is normal for production)")
 
 print("=== Full Environment (first 50 vars) ===")
-for i, (key, value) in enumerate(os.environ.items()):
-    if i >= 50:  # Limit output
-        break
+for key, value in islice(os.environ.items(), 50):  # Limit output
     # Don't print sensitive values
-    if any(sensitive in key.lower() for sensitive in ['secret', 'key', 'token', 'password']):
+    if SENSITIVE_KEY_PATTERN.search(key):
         print(f"{key}: [HIDDEN]")
     else:
         print(f"{key}: {value}")
\ No newline at end of file
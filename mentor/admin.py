@@ -1,11 +1,46 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, Q
+from functools import lru_cache
+from django.db.models import Count, Func, F, IntegerField, Q
+from talent.models import refresh_location_display
 from .models import MentorProfile
 
+@lru_cache(maxsize=4096)
+def render_mentor_display(profile_id, user_id, picture_name, full_name, username, age):
+    """
+    Changelist cell for a mentor. Every input is part of the cache key, so an
+    edited profile simply misses the cache; unchanged rows skip the storage URL
+    build, both reverse() calls and the escaping on later page views.
+    """
+    avatar_html = ""
+    if picture_name:
+        picture_url = MentorProfile._meta.get_field('profile_picture').storage.url(picture_name)
+        avatar_html = format_html(
+            '<img src="{}" width="40" height="40" style="border-radius: 50%; margin-right: 10px;" />',
+            picture_url
+        )
+    user_url = reverse('admin:userauths_user_change', args=[user_id])
+    profile_url = reverse('admin:mentor_mentorprofile_change', args=[profile_id])
+    return format_html(
+        '{}<a href="{}">{} {}</a><br><small style="color: #666;">Age: {} | <a href="{}">View Profile</a></small>',
+        avatar_html,
+        user_url,
+        full_name,
+        f"(@{username})",
+        age if age else "N/A",
+        profile_url
+    )
+
+
+SOCIAL_LINK_ICONS = {
+    "facebook": "🌐",
+    "linkedin": "🔗",
+    "instagram": "📸",
+}
+
 class HasSocialLinksFilter(admin.SimpleListFilter):
     title = 'Has Social Links'
     parameter_name = 'has_social_links'
@@ -13,9 +48,9 @@ class HasSocialLinksFilter(admin.SimpleListFilter):
         return (('yes', 'Yes'), ('no', 'No'))
     def queryset(self, request, queryset):
         if self.value() == 'yes':
-            return queryset.exclude(social_links={})
+            return queryset.filter(has_social_links=True)
         if self.value() == 'no':
-            return queryset.filter(social_links={})
+            return queryset.filter(has_social_links=False)
         return queryset
 
 
@@ -57,13 +92,21 @@ class MentorProfileAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
     list_per_page = 25
+    # Columns read by list_display (and by save() when list_editable rows are saved)
+    changelist_only_fields = (
+        'id', 'coaching_experience_years', 'is_verified', 'is_featured', 'is_available',
+        'created_at', 'city', 'state', 'country', 'location', 'location_display',
+        'profile_picture', 'social_links',
+        'user__id', 'user__firstname', 'user__lastname', 'user__full_name', 'user__username',
+    )
     actions = [
         'verify_mentors',
         'unverify_mentors',
         'feature_mentors',
         'unfeature_mentors',
         'export_mentor_data',
-        'send_completion_reminder'
+        'send_completion_reminder',
+        'recompute_location_display'
     ]
     fieldsets = (
         ('User Information', {
@@ -96,37 +139,23 @@ class MentorProfileAdmin(admin.ModelAdmin):
         }),
     )
     def mentor_display(self, obj):
-        avatar_html = ""
-        if obj.profile_picture:
-            avatar_html = f'<img src="{obj.profile_picture.url}" width="40" height="40" style="border-radius: 50%; margin-right: 10px;" />'
-        user_url = reverse('admin:userauths_user_change', args=[obj.user.id])
-        profile_url = reverse('admin:mentor_mentorprofile_change', args=[obj.id])
-        return format_html(
-            '{}<a href="{}">{} {}</a><br><small style="color: #666;">Age: {} | <a href="{}">View Profile</a></small>',
-            avatar_html,
-            user_url,
-            obj.user.get_full_name(),
-            f"(@{obj.user.username})",
-            obj.age if obj.age else "N/A",
-            profile_url
+        return render_mentor_display(
+            obj.id, obj.user.id, obj.profile_picture.name or '',
+            obj.user.get_full_name(), obj.user.username, obj.age_years
         )
     mentor_display.short_description = "Mentor"
     mentor_display.admin_order_field = 'user__firstname'
     def display_social_links(self, obj):
         if not obj.social_links:
             return '-'
-        icons = {
-            "facebook": "🌐",
-            "linkedin": "🔗",
-            "instagram": "📸",
-        }
-        html = []
-        for platform, url in obj.social_links.items():
-            icon = icons.get(platform, platform.title())
-            html.append(
-                f'<a href="{url}" target="_blank" style="margin-right:8px;text-decoration:none;">{icon} {platform.title()}</a>'
+        return format_html_join(
+            " | ",
+            '<a href="{}" target="_blank" style="margin-right:8px;text-decoration:none;">{} {}</a>',
+            (
+                (url, SOCIAL_LINK_ICONS.get(platform, platform.title()), platform.title())
+                for platform, url in obj.social_links.items()
             )
-        return format_html(" | ".join(html))
+        )
     display_social_links.short_description = 'Social Links'
 
     def created_date(self, obj):
@@ -168,9 +197,27 @@ class MentorProfileAdmin(admin.ModelAdmin):
         """Send profile completion reminder"""
         self.message_user(request, "Profile completion reminder would be sent to mentors (feature removed).")
     send_completion_reminder.short_description = "Send completion reminder"
+
+    def recompute_location_display(self, request, queryset):
+        """Rebuild location_display for selected mentors in batched UPDATEs rather than one save() each"""
+        # The status actions above are plain queryset.update() calls; this one
+        # needs a per-row value, so compute it in Python and write it back with bulk_update
+        changed, checked = refresh_location_display(queryset)
+        self.message_user(request, f"Recomputed location for {changed} of {checked} mentors.")
+    recompute_location_display.short_description = "Recompute location display"
     
     # Custom admin methods
     def get_queryset(self, request):
         """Optimize queryset with related data"""
-        return super().get_queryset(request).select_related('user')
+        queryset = super().get_queryset(request).select_related('user')
+        # Only the changelist gets the narrow rows; the change form needs every column
+        match = request.resolver_match
+        if match and match.url_name == 'mentor_mentorprofile_changelist':
+            queryset = queryset.only(*self.changelist_only_fields)
+        # Whole years since date_of_birth, worked out by Postgres for the page in one pass
+        return queryset.annotate(age_years=Func(
+            F('date_of_birth'),
+            template="DATE_PART('year', AGE(%(expressions)s))::integer",
+            output_field=IntegerField()
+        ))
 
@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
-from talent.models import TalentProfile
+from talent.models import TalentProfile, LOCATION_SOURCE_FIELDS, build_location_display
 
 
 class MentorProfile(models.Model):
@@ -16,9 +16,12 @@ class MentorProfile(models.Model):
     city = models.CharField(max_length=100, blank=True)
     state = models.CharField(max_length=100, blank=True)
     country = models.CharField(max_length=100, blank=True)
+    location_display = models.CharField(max_length=203, blank=True, editable=False)
     
     # Sports Coaching Information
     selected_sports = models.JSONField(default=list, blank=True, help_text="List of selected sports from the 25-30 sports list")
+    # Normalized copy of selected_sports, kept in sync by core.models.sync_profile_sports
+    sports = models.ManyToManyField('core.Sport', blank=True, related_name='mentor_profiles')
     coaching_experience_years = models.PositiveIntegerField(
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(50)],
@@ -44,6 +47,8 @@ class MentorProfile(models.Model):
     
     # Social Media Links
     social_links = models.JSONField(default=dict, blank=True, help_text="Links to social media profiles (Facebook, Instagram, etc.)")
+    # Maintained in save() so the admin filter hits an index instead of comparing jsonb
+    has_social_links = models.BooleanField(default=False, db_index=True, editable=False)
     
     # Coaching Information
     coaching_style = models.CharField(
@@ -95,6 +100,23 @@ class MentorProfile(models.Model):
         verbose_name = _('Mentor Profile')
         verbose_name_plural = _('Mentor Profiles')
         db_table = 'mentor_profiles'
+        # Mirror the field validators in Postgres so writes that skip them
+        # (bulk_create, queryset.update) still can't store out-of-range values.
+        # PositiveIntegerField already carries the >= 0 check.
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(coaching_experience_years__lte=50),
+                name='mentor_profiles_coaching_experience_years_max'
+            ),
+            models.CheckConstraint(
+                condition=models.Q(playing_experience_years__lte=50),
+                name='mentor_profiles_playing_experience_years_max'
+            ),
+            models.CheckConstraint(
+                condition=models.Q(max_students__gte=1, max_students__lte=100),
+                name='mentor_profiles_max_students_range'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - Mentor Profile"
@@ -116,4 +138,15 @@ class MentorProfile(models.Model):
         return None
     
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Partial saves that don't touch the location (admin actions, flag
+        # toggles) skip recomputing a display value they wouldn't write anyway
+        if update_fields is None or LOCATION_SOURCE_FIELDS.intersection(update_fields):
+            self.location_display = build_location_display(self.city, self.state, self.location)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'location_display'}
+        if update_fields is None or 'social_links' in update_fields:
+            self.has_social_links = bool(self.social_links)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'has_social_links'}
         super().save(*args, **kwargs)
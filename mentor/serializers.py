@@ -62,7 +62,9 @@ class MentorProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = MentorProfile
-        fields = '__all__'
+        # sports mirrors selected_sports for SQL-side matching and location_display /
+        # has_social_links are denormalized read helpers; the API keeps its original fields
+        exclude = ['sports', 'location_display', 'has_social_links']
         read_only_fields = ['id', 'user', 'date_of_birth', 'selected_sports', 'created_at', 'updated_at']
 
 class MentorOnboardingSerializer(serializers.ModelSerializer):
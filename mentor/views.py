@@ -74,12 +74,9 @@ class AddSelectedTalentAPIView(generics.CreateAPIView):
         # Create serializer with the user data
         serializer = self.get_serializer(data={'mentor': mentor_user.id, 'talent': talent_user.id})
         if serializer.is_valid():
-            # Check if this is a new selection
-            existing = MentorTalentSelection.objects.filter(mentor=mentor_user, talent=talent_user).exists()
-            created = not existing
-            
-            # Create the selection
+            # Create the selection, or fetch it if the mentor already made this decision
             selection = serializer.save()
+            created = serializer.created
             
             # Handle side effects for new selections
             if created:
@@ -193,9 +190,9 @@ class ListSelectedTalentsAPIView(generics.ListAPIView):
             return MentorTalentSelection.objects.none()
         
         # Get all selected talents with their related data
-        return MentorTalentSelection.objects.filter(mentor=mentor_user).select_related(
-            'talent__talent_profile', 'mentor__mentor_profile'
-        ).prefetch_related('talent__talent_profile__posts')
+        return MentorTalentSelectionSerializer.prefetch_queryset(
+            MentorTalentSelection.objects.filter(mentor=mentor_user)
+        )
 
     def list(self, request, *args, **kwargs):
         # Verify user is a mentor
@@ -228,12 +225,9 @@ class AddRejectedTalentAPIView(generics.CreateAPIView):
         # Create serializer with the user data
         serializer = self.get_serializer(data={'mentor': mentor_user.id, 'talent': talent_user.id})
         if serializer.is_valid():
-            # Check if this is a new rejection
-            existing = MentorTalentRejection.objects.filter(mentor=mentor_user, talent=talent_user).exists()
-            created = not existing
-            
-            # Create the rejection
+            # Create the rejection, or fetch it if the mentor already made this decision
             rejection = serializer.save()
+            created = serializer.created
             
             # Handle side effects for new rejections
             if created:
@@ -272,9 +266,9 @@ class ListRejectedTalentsAPIView(generics.ListAPIView):
             return MentorTalentRejection.objects.none()
         
         # Get all rejected talents with their related data
-        return MentorTalentRejection.objects.filter(mentor=mentor_user).select_related(
-            'talent__talent_profile', 'mentor__mentor_profile'
-        ).prefetch_related('talent__talent_profile__posts')
+        return MentorTalentRejectionSerializer.prefetch_queryset(
+            MentorTalentRejection.objects.filter(mentor=mentor_user)
+        )
 
     def list(self, request, *args, **kwargs):
         # Verify user is a mentor
@@ -295,9 +289,8 @@ class AddPostAPIView(generics.CreateAPIView):
             return Response({'error': 'Only talents can create posts.'}, status=status.HTTP_403_FORBIDDEN)
         
         # Get talent profile
-        try:
-            talent_profile = request.user.talent_profile
-        except:
+        talent_profile = getattr(request.user, 'talent_profile', None)
+        if talent_profile is None:
             return Response({'error': 'Talent profile not found.'}, status=status.HTTP_404_NOT_FOUND)
         
         serializer = self.get_serializer(data=request.data)
@@ -321,14 +314,13 @@ class DeletePostAPIView(generics.DestroyAPIView):
             raise PermissionDenied('Only talents can delete posts.')
         
         # Verify the post belongs to the talent
-        try:
-            talent_profile = self.request.user.talent_profile
-            if post.talent != talent_profile:
-                from rest_framework.exceptions import PermissionDenied
-                raise PermissionDenied('You can only delete your own posts.')
-        except:
+        talent_profile = getattr(self.request.user, 'talent_profile', None)
+        if talent_profile is None:
             from rest_framework.exceptions import NotFound
             raise NotFound('Talent profile not found.')
+        if post.talent_id != talent_profile.id:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('You can only delete your own posts.')
         
         return post
 
@@ -35,7 +35,7 @@ class NotificationDetailView(generics.RetrieveUpdateDestroyAPIView):
     def update(self, request, *args, **kwargs):
         notification = self.get_object()
         notification.is_read = True
-        notification.save()
+        notification.save(update_fields=['is_read'])
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
     
@@ -16,10 +16,19 @@ python debug_env.py
 
 echo "🔧 Environment: $(python -c "import os; print('Production' if os.getenv('DEBUG') == 'False' else 'Development')")"
 
-# Start the WSGI server with standard sync worker for Socket.io
-echo "🎯 Starting Gunicorn with sync worker for Socket.io..."
+# Pick the Gunicorn worker class matching the Socket.io async mode
+SOCKETIO_ASYNC_MODE=${SOCKETIO_ASYNC_MODE:-threading}
+case "$SOCKETIO_ASYNC_MODE" in
+    eventlet) WORKER_CLASS=eventlet ;;
+    gevent) WORKER_CLASS=gevent ;;
+    *) WORKER_CLASS=sync ;;
+esac
+
+# Start the WSGI server with a single worker for Socket.io (sessions are in-memory)
+echo "🎯 Starting Gunicorn with $WORKER_CLASS worker for Socket.io ($SOCKETIO_ASYNC_MODE mode)..."
 exec gunicorn backend.wsgi_socketio:application \
     --bind 0.0.0.0:$PORT \
+    --worker-class $WORKER_CLASS \
     --workers 1 \
     --timeout 120 \
     --access-logfile - \
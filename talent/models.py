@@ -3,6 +3,34 @@ from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 
+
+LOCATION_SOURCE_FIELDS = {'city', 'state', 'location'}
+
+
+def build_location_display(city, state, location):
+    """"City, State" when both are known, otherwise the free-form location"""
+    if city and state:
+        return f"{city}, {state}"
+    return location or ''
+
+
+def refresh_location_display(queryset, batch_size=500):
+    """
+    Recompute location_display for every profile in queryset, writing only
+    the rows whose stored value is out of date. Returns (changed, checked).
+    """
+    changed = []
+    checked = 0
+    for profile in queryset.only('id', 'city', 'state', 'location', 'location_display').iterator(chunk_size=2000):
+        checked += 1
+        location_display = build_location_display(profile.city, profile.state, profile.location)
+        if profile.location_display != location_display:
+            profile.location_display = location_display
+            changed.append(profile)
+    queryset.model.objects.bulk_update(changed, ['location_display'], batch_size=batch_size)
+    return len(changed), checked
+
+
 class TalentProfile(models.Model):
     """Profile model for Talent users"""
     
@@ -14,9 +42,12 @@ class TalentProfile(models.Model):
     city = models.CharField(max_length=100, blank=True)
     state = models.CharField(max_length=100, blank=True)
     country = models.CharField(max_length=100, blank=True)
+    location_display = models.CharField(max_length=203, blank=True, editable=False)
     
     # Sports Information
     selected_sports = models.JSONField(default=list, blank=True, help_text="List of selected sports from the 25-30 sports list")
+    # Normalized copy of selected_sports, kept in sync by core.models.sync_profile_sports
+    sports = models.ManyToManyField('core.Sport', blank=True, related_name='talent_profiles')
     experience_years = models.PositiveIntegerField(
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(50)],
@@ -45,6 +76,14 @@ class TalentProfile(models.Model):
         verbose_name = _('Talent Profile')
         verbose_name_plural = _('Talent Profiles')
         db_table = 'talent_profiles'
+        # Mirror the field validator in Postgres for writes that skip it;
+        # PositiveIntegerField already carries the >= 0 check
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(experience_years__lte=50),
+                name='talent_profiles_experience_years_max'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - Talent Profile"
@@ -68,6 +107,13 @@ class TalentProfile(models.Model):
     
     def save(self, *args, **kwargs):
         # Remove profile completion calculation
+        update_fields = kwargs.get('update_fields')
+        # Partial saves that don't touch the location (admin actions, flag
+        # toggles) skip recomputing a display value they wouldn't write anyway
+        if update_fields is None or LOCATION_SOURCE_FIELDS.intersection(update_fields):
+            self.location_display = build_location_display(self.city, self.state, self.location)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'location_display'}
         super().save(*args, **kwargs)
 
 class Post(models.Model):
@@ -7,7 +7,9 @@ class TalentProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = TalentProfile
-        fields = '__all__'
+        # sports mirrors selected_sports for SQL-side matching and location_display
+        # is a denormalized read helper; the API keeps its original fields
+        exclude = ['sports', 'location_display']
 
 class TalentOnboardingSerializer(serializers.ModelSerializer):
     class Meta:
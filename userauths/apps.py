@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import pre_migrate
+
+
+def create_trigram_extension(using, **kwargs):
+    """
+    The users trigram indexes need pg_trgm. Migrations are generated at build
+    time, so the extension is created here, before any migration runs.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
 
 
 class UserauthsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'userauths'
+    
+    def ready(self):
+        pre_migrate.connect(create_trigram_extension, sender=self)
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db.models.signals import post_save
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
@@ -60,6 +62,13 @@ class User(AbstractUser):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         db_table = 'users'
+        # Trigram indexes over UPPER(col), the expression Django's icontains
+        # compares, so name searches are index scans instead of table scans
+        indexes = [
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='users_username_trgm'),
+            GinIndex(OpClass(Upper('firstname'), name='gin_trgm_ops'), name='users_firstname_trgm'),
+            GinIndex(OpClass(Upper('lastname'), name='gin_trgm_ops'), name='users_lastname_trgm'),
+        ]
     
     def __str__(self):
         return self.email
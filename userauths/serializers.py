@@ -84,7 +84,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
-    avatar_url = serializers.SerializerMethodField()
+    avatar_url = serializers.ReadOnlyField(source='get_avatar_url')
     
     class Meta:
         model = User
@@ -103,9 +103,6 @@ class UserSerializer(serializers.ModelSerializer):
             'phone_number': {'help_text': 'Phone number'},
             'full_name': {'help_text': 'Full name of the user'},
         }
-    
-    def get_avatar_url(self, obj):
-        return obj.get_avatar_url()
 
 
 class ChangePasswordSerializer(serializers.Serializer):